@@ -0,0 +1 @@
+"""Benchmarks of the jack compiler, run with python -m benchmarks.bench_compiler"""
@@ -0,0 +1,336 @@
+"""This module benchmarks every stage of the compiler on synthetic jack projects"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from syntax_analyzer import config
+from syntax_analyzer.source_reader import load_source, read_lines
+from syntax_analyzer.jack_token import bytes_per_token
+from syntax_analyzer.jack_tokenizer import JackTokenizer
+from syntax_analyzer.jack_comp_engine import JackCompEngine
+from syntax_analyzer.xml_emitter import NullEmitter, XmlEmitter, XmlWriter
+from code_generator.jack_compiler import JackCompiler
+from .corpus_generator import CorpusGenerator
+
+# Startup is measured with the packages of this checkout
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ["read", "tokenize", "tokenize_legacy", "parse", "emit_xml", "stream_xml", "codegen"]
+
+# Commands timed from process start to exit, {file} is a small jack file
+STARTUP_COMMANDS = {
+    "python": ["-c", "pass"],
+    "help": ["-m", "syntax_analyzer", "--help"],
+    "single_file": ["-m", "syntax_analyzer", "{file}", "-o", "{output_dir}", "--no-cache"],
+}
+
+
+def best_time(func, repeat: int) -> tuple:
+    """
+    Runs a function several times and keeps the fastest run.
+
+    Args:
+        func (callable): Function to time
+        repeat (int): Number of runs
+
+    Returns:
+        timing (tuple): Seconds of the fastest run and the result of the last run
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def tokenize_legacy(tokenizer: JackTokenizer, source: str) -> list:
+    """
+    Tokenizes a source line by line with the legacy tokenizer.
+    """
+    return [tokenizer.tokenize_line(line.strip()) for line in source.splitlines() if line.strip()]
+
+
+def parse_only(comp_engine: JackCompEngine, tokens: list):
+    """
+    Parses tokens through the null emitter, so no xml is written and the
+    parsed class members are dropped as soon as they are visited.
+    """
+    comp_engine.stream_xml(None, tokens, NullEmitter())
+
+
+def emit_xml(tree) -> str:
+    """
+    Writes a syntax tree as xml into memory.
+    """
+    xml_file = io.StringIO()
+    emitter = XmlEmitter(xml_file)
+    XmlWriter(emitter).visit(tree)
+    emitter.flush()
+    return xml_file.getvalue()
+
+
+def measure_startup(file_path: str, repeat: int) -> dict:
+    """
+    Times fresh analyzer processes, including interpreter startup and imports.
+
+    Args:
+        file_path (str): Small jack file for the single file compile
+        repeat (int): Runs per command, the fastest is kept
+
+    Returns:
+        seconds (dict): Seconds per command of STARTUP_COMMANDS
+    """
+    seconds = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, arguments in STARTUP_COMMANDS.items():
+            command = [sys.executable] + [
+                argument.format(file=file_path, output_dir=output_dir) for argument in arguments
+            ]
+            seconds[name], _ = best_time(
+                lambda: subprocess.run(command, cwd=ROOT_DIR, check=True, stdout=subprocess.DEVNULL),
+                repeat,
+            )
+    return seconds
+
+
+def stream_xml(comp_engine: JackCompEngine, tokenizer: JackTokenizer, file_path: str):
+    """
+    Reads, tokenizes, parses and writes a file lazily. The xml is discarded,
+    so the measured memory is that of the pipeline alone.
+    """
+    with open(os.devnull, "w") as xml_file:
+        comp_engine.stream_xml(xml_file, tokenizer.tokenize_lines(read_lines(file_path)))
+
+
+class CompilerBenchmark:
+    """
+    Times the stages of the compiler separately over a set of jack files.
+    """
+    def __init__(self, repeat: int = 3):
+        self.repeat = repeat
+        self.tokenizer = JackTokenizer()
+        self.comp_engine = JackCompEngine()
+        self.compiler = JackCompiler()
+
+    def run(self, file_paths: list) -> dict:
+        """
+        Benchmarks a set of files.
+
+        Args:
+            file_paths (list): Paths of the jack files
+
+        Returns:
+            result (dict): Seconds, tokens per second and peak memory per stage,
+                and the average memory of a token out of the tokenize stage
+        """
+        seconds = dict.fromkeys(STAGES, 0.0)
+        tokens = 0
+        token_bytes = 0.0
+        source_bytes = 0
+        for file_path in file_paths:
+            elapsed, source = best_time(lambda: load_source(file_path), self.repeat)
+            seconds["read"] += elapsed
+            elapsed, file_tokens = best_time(lambda: self.tokenizer.tokenize(source), self.repeat)
+            seconds["tokenize"] += elapsed
+            elapsed, _ = best_time(lambda: tokenize_legacy(self.tokenizer, source), self.repeat)
+            seconds["tokenize_legacy"] += elapsed
+            elapsed, _ = best_time(lambda: parse_only(self.comp_engine, file_tokens), self.repeat)
+            seconds["parse"] += elapsed
+            # The later stages need the whole tree, building it is not timed
+            tree = self.comp_engine.parse([file_tokens])
+            elapsed, _ = best_time(lambda: emit_xml(tree), self.repeat)
+            seconds["emit_xml"] += elapsed
+            elapsed, _ = best_time(lambda: stream_xml(self.comp_engine, self.tokenizer, file_path), self.repeat)
+            seconds["stream_xml"] += elapsed
+            elapsed, _ = best_time(lambda: self.compiler.compile_tree(tree), self.repeat)
+            seconds["codegen"] += elapsed
+            tokens += len(file_tokens)
+            token_bytes += bytes_per_token(file_tokens) * len(file_tokens)
+            source_bytes += len(source)
+
+        return {
+            "files": len(file_paths),
+            "tokens": tokens,
+            "source_bytes": source_bytes,
+            "seconds": seconds,
+            "tokens_per_sec": {
+                stage: (tokens / elapsed if elapsed else None) for stage, elapsed in seconds.items()
+            },
+            "peak_memory_bytes": self.measure_memory(file_paths),
+            "bytes_per_token": token_bytes / tokens if tokens else 0.0,
+        }
+
+    def measure_memory(self, file_paths: list) -> dict:
+        """
+        Measures the peak traced memory of every stage on the largest file.
+        Runs separately from the timings, tracing slows the code down.
+        """
+        largest = max(file_paths, key=os.path.getsize)
+        peaks = {}
+        tracemalloc.start()
+        try:
+            stages = [
+                ("read", lambda _: load_source(largest)),
+                ("tokenize", self.tokenizer.tokenize),
+                ("parse", lambda tokens: self.comp_engine.parse([tokens])),
+                ("emit_xml", emit_xml),
+                # Whole pipeline from the file, compare with the sum of the stages above
+                ("stream_xml", lambda _: stream_xml(self.comp_engine, self.tokenizer, largest)),
+            ]
+            value = None
+            for stage, func in stages:
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                value = func(value)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks[stage] = peak - baseline
+        finally:
+            tracemalloc.stop()
+        return peaks
+
+
+def run_benchmarks(generator_options: dict, scales: list, repeat: int, corpus_dir: str = None) -> dict:
+    """
+    Generates a corpus for every scale and benchmarks it.
+
+    Args:
+        generator_options (dict): Options of the corpus generator at scale 1
+        scales (list): Multipliers of the number of classes
+        repeat (int): Runs per stage, the fastest is kept
+        corpus_dir (str): Where the corpora are written, a temporary directory by default
+
+    Returns:
+        report (dict): Benchmark report
+    """
+    benchmark = CompilerBenchmark(repeat=repeat)
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = corpus_dir or tmp_dir
+        for scale in scales:
+            options = dict(generator_options, classes=generator_options["classes"] * scale)
+            generator = CorpusGenerator(**options)
+            file_paths = generator.write_project(os.path.join(base_dir, f"scale_{scale}"))
+            result = benchmark.run(file_paths)
+            result["scale"] = scale
+            result["generator"] = options
+            runs.append(result)
+
+        startup = measure_startup(min(file_paths, key=os.path.getsize), repeat)
+
+    return {
+        "compiler_version": config.COMPILER_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "repeat": repeat,
+        "startup_seconds": startup,
+        "runs": runs,
+    }
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Finds the stages that got slower than a baseline report.
+
+    Args:
+        report (dict): Current report
+        baseline (dict): Report of an earlier version
+        tolerance (float): Allowed slowdown, 0.2 allows 20% fewer tokens per second
+            and 20% more bytes per token
+
+    Returns:
+        regressions (list): Descriptions of the regressed stages
+    """
+    baseline_runs = {run["scale"]: run for run in baseline["runs"]}
+    regressions = []
+    for run in report["runs"]:
+        old_run = baseline_runs.get(run["scale"])
+        if old_run is None:
+            continue
+        for stage, speed in run["tokens_per_sec"].items():
+            old_speed = old_run["tokens_per_sec"].get(stage)
+            if speed and old_speed and speed < old_speed * (1 - tolerance):
+                regressions.append(
+                    f"scale {run['scale']} {stage}: {old_speed:,.0f} -> {speed:,.0f} tokens/sec"
+                )
+        size = run.get("bytes_per_token")
+        old_size = old_run.get("bytes_per_token")
+        if size and old_size and size > old_size * (1 + tolerance):
+            regressions.append(f"scale {run['scale']} tokenize: {old_size:,.1f} -> {size:,.1f} bytes/token")
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats a report as a table of tokens per second.
+    """
+    lines = [f"jack compiler {report['compiler_version']} on python {report['python']}"]
+    lines.append(f"{'scale':>6} {'files':>6} {'tokens':>9}  " + "  ".join(f"{stage:>15}" for stage in STAGES))
+    for run in report["runs"]:
+        speeds = "  ".join(
+            f"{run['tokens_per_sec'][stage] or 0:>15,.0f}" for stage in STAGES
+        )
+        lines.append(f"{run['scale']:>6} {run['files']:>6} {run['tokens']:>9}  {speeds}")
+    lines.append("tokens/sec per stage, peak memory of the largest file at the last scale:")
+    peaks = report["runs"][-1]["peak_memory_bytes"]
+    lines.append("  " + ", ".join(f"{stage}: {peak / 1024:,.0f} KiB" for stage, peak in peaks.items()))
+    lines.append(f"memory per token out of tokenize: {report['runs'][-1]['bytes_per_token']:,.1f} bytes")
+    lines.append("startup of a fresh process:")
+    lines.append("  " + ", ".join(f"{name}: {seconds * 1000:,.1f} ms" for name, seconds in report["startup_seconds"].items()))
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the jack compiler.")
+    parser.add_argument("--classes", type=int, default=10, help="Number of classes at scale 1")
+    parser.add_argument("--subroutines", type=int, default=10, help="Subroutines per class")
+    parser.add_argument("--depth", type=int, default=2, help="Nesting depth of if and while statements")
+    parser.add_argument("--expression-length", type=int, default=4, help="Terms per expression")
+    parser.add_argument("--statements", type=int, default=6, help="Statements per block")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the corpus generator")
+    parser.add_argument("--scales", default="1,2,4", help="Comma separated class count multipliers")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the fastest is kept")
+    parser.add_argument("--corpus-dir", default=None, help="Keep the generated corpora in this directory")
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", default=None, help="JSON report of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    benchmark_report = run_benchmarks(
+        {
+            "classes": args.classes,
+            "subroutines": args.subroutines,
+            "depth": args.depth,
+            "expression_length": args.expression_length,
+            "statements": args.statements,
+            "seed": args.seed,
+        },
+        [int(scale) for scale in args.scales.split(",")],
+        args.repeat,
+        args.corpus_dir,
+    )
+    print(format_report(benchmark_report))
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(benchmark_report, report_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            found = compare_reports(benchmark_report, json.load(baseline_file), args.tolerance)
+        for regression in found:
+            print(f"regression: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
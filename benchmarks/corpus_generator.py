@@ -0,0 +1,182 @@
+"""This module generates synthetic jack projects for benchmarking"""
+import argparse
+import os
+import random
+
+OPS = ["+", "-", "*", "/", "&", "|", "<", ">", "="]
+
+
+class CorpusGenerator:
+    """
+    Generates valid jack classes of a configurable size.
+    """
+    def __init__(
+        self,
+        classes: int = 10,
+        subroutines: int = 10,
+        depth: int = 2,
+        expression_length: int = 4,
+        statements: int = 6,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            classes (int): Number of classes
+            subroutines (int): Subroutines per class
+            depth (int): Nesting depth of if and while statements
+            expression_length (int): Terms per expression
+            statements (int): Statements per block
+            seed (int): Seed of the random generator, the same seed gives the same corpus
+        """
+        self.classes = classes
+        self.subroutines = subroutines
+        self.depth = depth
+        self.expression_length = expression_length
+        self.statements = statements
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def write_project(self, dir_path: str) -> list:
+        """
+        Writes the generated classes into a directory.
+
+        Args:
+            dir_path (str): Output directory
+
+        Returns:
+            file_paths (list): Paths of the written jack files
+        """
+        os.makedirs(dir_path, exist_ok=True)
+        self.random.seed(self.seed)
+        file_paths = []
+        for class_index in range(self.classes):
+            class_name = f"Class{class_index}"
+            file_path = os.path.join(dir_path, f"{class_name}.jack")
+            with open(file_path, "w") as jack_file:
+                jack_file.write(self.generate_class(class_name))
+            file_paths.append(file_path)
+        return file_paths
+
+    def generate_class(self, class_name: str) -> str:
+        """
+        Generates the source of one class.
+        """
+        lines = [
+            f"/** Generated class {class_name} */",
+            f"class {class_name} {{",
+            "    field int count, total;",
+            "    static int instances;",
+            "",
+            f"    constructor {class_name} new() {{",
+            "        let count = 0;",
+            "        let total = 0;",
+            "        let instances = instances + 1;",
+            "        return this;",
+            "    }",
+        ]
+        for index in range(self.subroutines):
+            lines.extend(self.generate_subroutine(index))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def generate_subroutine(self, index: int) -> list:
+        """
+        Generates one method with locals, nested blocks and a return.
+        """
+        lines = [
+            "",
+            f"    // Method number {index}",
+            f"    method int method{index}(int a, int b) {{",
+            "        var int i, j;",
+            "        var String s;",
+            "        var Array values;",
+            "        let values = Array.new(10);",
+        ]
+        lines.extend(self.generate_block(self.depth, 2))
+        lines.append(f"        return {self.generate_expression()};")
+        lines.append("    }")
+        return lines
+
+    def generate_block(self, depth: int, indent: int) -> list:
+        """
+        Generates a block of statements nested depth levels deep.
+        """
+        pad = "    " * indent
+        lines = []
+        for _ in range(self.statements):
+            choice = self.random.random()
+            if depth > 0 and choice < 0.2:
+                lines.append(f"{pad}if ({self.generate_expression()}) {{")
+                lines.extend(self.generate_block(depth - 1, indent + 1))
+                lines.append(f"{pad}}} else {{")
+                lines.extend(self.generate_block(depth - 1, indent + 1))
+                lines.append(f"{pad}}}")
+            elif depth > 0 and choice < 0.35:
+                lines.append(f"{pad}while ({self.generate_expression()}) {{")
+                lines.extend(self.generate_block(depth - 1, indent + 1))
+                lines.append(f"{pad}}}")
+            elif choice < 0.55:
+                lines.append(f"{pad}let values[i] = {self.generate_expression()};")
+            elif choice < 0.7:
+                lines.append(f'{pad}let s = "generated string {self.random.randint(0, 999)}";')
+            elif choice < 0.85:
+                lines.append(f"{pad}do Output.printInt({self.generate_expression()});")
+            else:
+                variable = self.random.choice(["i", "j", "count", "total"])
+                lines.append(f"{pad}let {variable} = {self.generate_expression()};")
+        return lines
+
+    def generate_expression(self) -> str:
+        """
+        Generates an expression with expression_length terms.
+        """
+        parts = [self.generate_term()]
+        for _ in range(self.expression_length - 1):
+            parts.append(self.random.choice(OPS))
+            parts.append(self.generate_term())
+        return " ".join(parts)
+
+    def generate_term(self) -> str:
+        """
+        Generates a single term.
+        """
+        choice = self.random.random()
+        if choice < 0.3:
+            return str(self.random.randint(0, 1000))
+        if choice < 0.6:
+            return self.random.choice(["a", "b", "i", "j", "count", "total"])
+        if choice < 0.7:
+            return "values[j]"
+        if choice < 0.8:
+            return f"(a {self.random.choice(OPS)} {self.random.randint(1, 9)})"
+        if choice < 0.9:
+            return "-b"
+        return "Math.max(a, b)"
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic jack project.")
+    parser.add_argument("output_dir", help="Directory the jack files are written to")
+    parser.add_argument("--classes", type=int, default=10, help="Number of classes")
+    parser.add_argument("--subroutines", type=int, default=10, help="Subroutines per class")
+    parser.add_argument("--depth", type=int, default=2, help="Nesting depth of if and while statements")
+    parser.add_argument("--expression-length", type=int, default=4, help="Terms per expression")
+    parser.add_argument("--statements", type=int, default=6, help="Statements per block")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    generator = CorpusGenerator(
+        classes=args.classes,
+        subroutines=args.subroutines,
+        depth=args.depth,
+        expression_length=args.expression_length,
+        statements=args.statements,
+        seed=args.seed,
+    )
+    generator.write_project(args.output_dir)
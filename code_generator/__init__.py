@@ -0,0 +1 @@
+"""Vm code generation and optimizations of the jack compiler"""
@@ -0,0 +1,5 @@
+"""Runs the compiler with python -m code_generator"""
+import sys
+from .cli import main
+
+sys.exit(main())
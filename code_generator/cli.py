@@ -0,0 +1,146 @@
+"""This module contains the command line interface of the compiler"""
+import argparse
+import os
+import sys
+from syntax_analyzer.diagnostics import DIAGNOSTIC_FORMATS
+from .peephole import PeepholeOptimizer, PATTERNS
+from .strength_reduction import StrengthReducer, DEFAULT_MAX_INSTRUCTIONS
+from .vm_encoding import OUTPUT_FORMATS
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        args (argparse.Namespace): Parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="jack-compiler", description="Compile jack files into vm files.")
+    parser.add_argument("input_path", help="Jack file or directory containing the jack files")
+    parser.add_argument(
+        "-o", "--output-dir",
+        default=None,
+        help="Directory for the vm files, defaults to next to the sources",
+    )
+    parser.add_argument(
+        "-O", "--optimize",
+        action="store_true",
+        help="Enable every optimization: constant folding, strength reduction and the peephole optimizer",
+    )
+    parser.add_argument(
+        "--strength-reduce",
+        action="store_true",
+        help="Replace multiplications and divisions by constants with inline vm code",
+    )
+    parser.add_argument(
+        "--max-inline",
+        type=int,
+        default=DEFAULT_MAX_INSTRUCTIONS,
+        help="Longest inline sequence strength reduction may use in place of one call",
+    )
+    parser.add_argument(
+        "--fold-constants",
+        action="store_true",
+        help="Fold constant expressions before generating vm code",
+    )
+    parser.add_argument(
+        "--peephole-patterns",
+        default=",".join(PATTERNS),
+        help=f"Comma separated peephole patterns to apply, out of: {', '.join(PATTERNS)}",
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help="Signature index file used to check calls, .jack_index.json in the input directory by default",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Dont check calls against the signatures of the other classes",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="text",
+        help="Write text .vm files, or packed binary .vmb files that load faster",
+    )
+    parser.add_argument(
+        "--diagnostics",
+        choices=DIAGNOSTIC_FORMATS,
+        default="text",
+        help="Report every error as file:line:column: message, or as one JSON object per line",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print optimization statistics to stderr",
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="count",
+        default=0,
+        help="Print debug output such as the token list",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the compiler from the command line.
+    The compiler modules are imported after the arguments are parsed, so
+    --help and argument errors return without loading them.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        status (int): Exit status, 1 if a file failed to compile
+    """
+    args = parse_args(argv)
+    # pylint: disable=import-outside-toplevel
+    from .jack_compiler import JackCompiler
+    from .constant_folder import ConstantFolder
+    from .signature_index import SignatureIndex, DEFAULT_INDEX_PATH
+
+    peephole_optimizer = None
+    if args.optimize:
+        peephole_optimizer = PeepholeOptimizer(
+            [pattern for pattern in args.peephole_patterns.split(",") if pattern]
+        )
+    constant_folder = ConstantFolder() if args.optimize or args.fold_constants else None
+    strength_reducer = None
+    if args.optimize or args.strength_reduce:
+        strength_reducer = StrengthReducer(max_instructions=args.max_inline)
+    signature_index = None
+    if not args.no_index:
+        index_path = args.index
+        if index_path is None:
+            project_dir = args.input_path if os.path.isdir(args.input_path) else os.path.dirname(args.input_path)
+            index_path = os.path.join(project_dir, DEFAULT_INDEX_PATH)
+        signature_index = SignatureIndex(index_path)
+    jack_compiler_cls = JackCompiler(
+        verbosity=args.verbose,
+        optimizer=peephole_optimizer,
+        folder=constant_folder,
+        reducer=strength_reducer,
+        index=signature_index,
+        diagnostics_format=args.diagnostics,
+        output_format=args.output_format,
+    )
+    failed = jack_compiler_cls.compile_files(args.input_path, args.output_dir)
+    if args.stats and signature_index is not None:
+        print(f"signature index: {signature_index.scanned} files rescanned", file=sys.stderr)
+    if args.stats and constant_folder is not None:
+        print(f"constant folding: {constant_folder.folded} rewrites", file=sys.stderr)
+    if args.stats and strength_reducer is not None:
+        print(strength_reducer.format_report(), file=sys.stderr)
+    if args.stats and peephole_optimizer is not None:
+        print(peephole_optimizer.format_report(), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,11 @@
+from .vm_encoding import VmProgram
+
+
 class CodeGenerator:
     """
-    Generates VM code from the parsed XML structure.
+    Generates VM code from the parsed syntax tree.
+    Instructions are kept as (command, *arguments) tuples and only
+    turned into text by get_output, or encoded by get_program.
     """
     def __init__(self):
         self.output = []
@@ -13,7 +18,7 @@ class CodeGenerator:
             segment (str): The memory segment.
             index (int): The index within the segment.
         """
-        self.output.append(f"push {segment} {index}")
+        self.output.append(("push", segment, index))
 
     def write_pop(self, segment, index):
         """
@@ -23,7 +28,7 @@ class CodeGenerator:
             segment (str): The memory segment.
             index (int): The index within the segment.
         """
-        self.output.append(f"pop {segment} {index}")
+        self.output.append(("pop", segment, index))
 
     def write_arithmetic(self, command):
         """
@@ -32,7 +37,7 @@ class CodeGenerator:
         Args:
             command (str): The arithmetic command.
         """
-        self.output.append(command)
+        self.output.append((command,))
 
     def write_label(self, label):
         """
@@ -41,7 +46,7 @@ class CodeGenerator:
         Args:
             label (str): The label name.
         """
-        self.output.append(f"label {label}")
+        self.output.append(("label", label))
 
     def write_goto(self, label):
         """
@@ -50,7 +55,7 @@ class CodeGenerator:
         Args:
             label (str): The label name.
         """
-        self.output.append(f"goto {label}")
+        self.output.append(("goto", label))
 
     def write_if(self, label):
         """
@@ -59,7 +64,7 @@ class CodeGenerator:
         Args:
             label (str): The label name.
         """
-        self.output.append(f"if-goto {label}")
+        self.output.append(("if-goto", label))
 
     def write_call(self, name, n_args):
         """
@@ -69,7 +74,7 @@ class CodeGenerator:
             name (str): The function name.
             n_args (int): The number of arguments.
         """
-        self.output.append(f"call {name} {n_args}")
+        self.output.append(("call", name, n_args))
 
     def write_function(self, name, n_locals):
         """
@@ -79,13 +84,31 @@ class CodeGenerator:
             name (str): The function name.
             n_locals (int): The number of local variables.
         """
-        self.output.append(f"function {name} {n_locals}")
+        self.output.append(("function", name, n_locals))
 
     def write_return(self):
         """
         Writes a return command.
         """
-        self.output.append("return")
+        self.output.append(("return",))
+
+    def get_instructions(self):
+        """
+        Returns the generated instructions.
+
+        Returns:
+            list: The VM code as a list of (command, *arguments) tuples.
+        """
+        return self.output
+
+    def set_instructions(self, instructions):
+        """
+        Replaces the generated instructions, used by optimization passes.
+
+        Args:
+            instructions (list): The VM code as a list of (command, *arguments) tuples.
+        """
+        self.output = instructions
 
     def get_output(self):
         """
@@ -94,4 +117,13 @@ class CodeGenerator:
         Returns:
             list: The VM code as a list of strings.
         """
-        return self.output
\ No newline at end of file
+        return [" ".join(map(str, instruction)) for instruction in self.output]
+
+    def get_program(self):
+        """
+        Returns the generated VM code in the compact binary encoding.
+
+        Returns:
+            VmProgram: The VM code as opcodes, segment ids and operands.
+        """
+        return VmProgram.from_instructions(self.output)
@@ -0,0 +1,207 @@
+"""This module folds constant expressions of the syntax tree before vm code is generated"""
+from syntax_analyzer.jack_token import Token, INT_CONST, KEYWORD, SYMBOL
+from syntax_analyzer.jack_ast import Expression, Term
+
+# Largest value an integer constant can have
+MAX_CONSTANT = 32767
+
+# Values of the keyword constants on the Hack platform
+KEYWORD_VALUES = {
+    "true": -1,
+    "false": 0,
+    "null": 0
+}
+
+# Operators that leave the left operand unchanged for a given right operand
+RIGHT_IDENTITIES = {
+    "+": 0,
+    "-": 0,
+    "|": 0,
+    "*": 1,
+    "/": 1,
+    "&": -1
+}
+
+# Operators that leave the right operand unchanged for a given left operand
+LEFT_IDENTITIES = {
+    "+": 0,
+    "|": 0,
+    "*": 1,
+    "&": -1
+}
+
+
+def wrap(value: int) -> int:
+    """
+    Wraps a value to a signed 16 bit integer.
+    """
+    return ((value + 32768) & 0xFFFF) - 32768
+
+
+def apply_op(op: str, left: int, right: int):
+    """
+    Evaluates a binary operator like the Hack platform does.
+
+    Returns:
+        value (int): The result, or None if it cant be folded
+    """
+    if op == "+":
+        return wrap(left + right)
+    if op == "-":
+        return wrap(left - right)
+    if op == "*":
+        return wrap(left * right)
+    if op == "/":
+        if right == 0:
+            # Leave the error to Math.divide at runtime
+            return None
+        # Math.divide truncates towards zero
+        quotient = abs(left) // abs(right)
+        return wrap(-quotient if (left < 0) != (right < 0) else quotient)
+    if op == "&":
+        return wrap(left & right)
+    if op == "|":
+        return wrap(left | right)
+    if op == "<":
+        return -1 if left < right else 0
+    if op == ">":
+        return -1 if left > right else 0
+    if op == "=":
+        return -1 if left == right else 0
+    return None
+
+
+def term_value(term):
+    """
+    Returns the value of a constant term, or None if the term isnt constant.
+    """
+    first = term.children[0]
+    if not isinstance(first, Token):
+        return None
+    if first.kind == INT_CONST:
+        return wrap(int(first.value))
+    if first.kind == KEYWORD:
+        return KEYWORD_VALUES.get(first.value)
+    if first.kind == SYMBOL and len(term.children) == 2:
+        value = term_value(term.children[1])
+        if value is None:
+            return None
+        return wrap(-value) if first.value == "-" else ~value
+    if first.value == "(":
+        return expression_value(term.children[1])
+    return None
+
+
+def expression_value(expression):
+    """
+    Returns the value of a constant expression, or None if the expression isnt constant.
+    """
+    value = term_value(expression.children[0])
+    for op_token, term in zip(expression.children[1::2], expression.children[2::2]):
+        if value is None:
+            return None
+        right = term_value(term)
+        if right is None:
+            return None
+        value = apply_op(op_token.value, value, right)
+    return value
+
+
+class ConstantFolder:
+    """
+    Rewrites a syntax tree so constant subexpressions are evaluated at compile time
+    and identities such as x + 0, x * 1 and --x are removed.
+    Expressions are folded left to right, as Jack has no operator precedence.
+    """
+    def __init__(self):
+        self.folded = 0
+
+    def fold(self, node):
+        """
+        Folds every expression in a tree. Unchanged subtrees are shared, not copied.
+
+        Args:
+            node (Node): Root of the (sub)tree
+
+        Returns:
+            node (Node): The folded tree
+        """
+        if isinstance(node, Token):
+            return node
+        children = tuple(self.fold(child) for child in node.children)
+        if isinstance(node, Expression):
+            return self.fold_expression(children)
+        if isinstance(node, Term):
+            return self.fold_term(children)
+        if all(new is old for new, old in zip(children, node.children)):
+            return node
+        return type(node)(children)
+
+    def fold_expression(self, children: tuple) -> Expression:
+        """
+        Folds an expression whose terms are already folded.
+        """
+        terms = [children[0]]
+        # Value of the expression so far, None once it depends on a variable
+        value = term_value(children[0])
+
+        for op_token, term in zip(children[1::2], children[2::2]):
+            op = op_token.value
+            right = term_value(term)
+            if value is not None and right is not None:
+                result = apply_op(op, value, right)
+                if result is not None:
+                    value = result
+                    terms = [self.make_constant(value)]
+                    self.folded += 1
+                    continue
+            if right is not None and RIGHT_IDENTITIES.get(op) == right:
+                # x op identity
+                self.folded += 1
+                continue
+            if value is not None and LEFT_IDENTITIES.get(op) == value and len(terms) == 1:
+                # identity op x
+                terms = [term]
+                value = None
+                self.folded += 1
+                continue
+            terms.extend((op_token, term))
+            value = None
+
+        return Expression(terms)
+
+    def fold_term(self, children: tuple) -> Term:
+        """
+        Folds a term whose subterms are already folded.
+        """
+        first = children[0]
+        if isinstance(first, Token) and first.kind == SYMBOL:
+            if first.value == "(":
+                expression = children[1]
+                if len(expression.children) == 1:
+                    # Parentheses around a single term
+                    return expression.children[0]
+            elif first.value in ("-", "~"):
+                inner = children[1]
+                value = term_value(inner)
+                if value is not None:
+                    self.folded += 1
+                    return self.make_constant(wrap(-value) if first.value == "-" else ~value)
+                inner_first = inner.children[0]
+                if isinstance(inner_first, Token) and inner_first.value == first.value and len(inner.children) == 2:
+                    # --x or ~~x
+                    self.folded += 1
+                    return inner.children[1]
+        return Term(children)
+
+    def make_constant(self, value: int) -> Term:
+        """
+        Builds the term of a constant. Negative values become a negated integer constant.
+        """
+        if value >= 0:
+            return Term([Token(INT_CONST, str(value))])
+        if value > -MAX_CONSTANT - 1:
+            return Term([Token(SYMBOL, "-"), Term([Token(INT_CONST, str(-value))])])
+        # -32768 has no positive counterpart, build it as (-32767 - 1)
+        expression = Expression([self.make_constant(-MAX_CONSTANT), Token(SYMBOL, "-"), self.make_constant(1)])
+        return Term([Token(SYMBOL, "("), expression, Token(SYMBOL, ")")])
@@ -0,0 +1,520 @@
+"""This module is used to compile input jack files into output vm files"""
+import os
+import sys
+
+from syntax_analyzer.jack_tokenizer import JackTokenizer
+from syntax_analyzer.jack_comp_engine import JackCompEngine
+from syntax_analyzer.jack_token import INT_CONST, STRING_CONST, KEYWORD, IDENTIFIER
+from syntax_analyzer.jack_ast import SubroutineCall, LetStatement, IfStatement, WhileStatement, DoStatement
+from syntax_analyzer.source_reader import load_source, strip_comments
+from syntax_analyzer.diagnostics import collect_diagnostics, format_diagnostics
+from .code_generator import CodeGenerator
+from .symbol_table import SymbolTable
+from .peephole import PeepholeOptimizer
+from .constant_folder import ConstantFolder, term_value
+from .strength_reduction import StrengthReducer
+from .signature_index import SignatureIndex
+from .vm_encoding import write_program, FILE_EXTENSIONS
+
+# Symbol table kinds mapped to vm memory segments
+SEGMENTS = {
+    "static": "static",
+    "field": "this",
+    "arg": "argument",
+    "var": "local"
+}
+
+# Binary operators that map to a single vm command
+ARITHMETIC_OPS = {
+    "+": "add",
+    "-": "sub",
+    "&": "and",
+    "|": "or",
+    "<": "lt",
+    ">": "gt",
+    "=": "eq"
+}
+
+# Binary operators implemented by the OS
+OS_OPS = {
+    "*": "Math.multiply",
+    "/": "Math.divide"
+}
+
+UNARY_COMMANDS = {
+    "-": "neg",
+    "~": "not"
+}
+
+
+class JackCompiler:
+    """
+    Class used to compile jack files straight into vm files.
+    The parser builds the syntax tree and the compile_* methods walk it,
+    filling the symbol table and writing vm code as they go.
+    """
+    def __init__(
+        self,
+        verbosity: int = 0,
+        optimizer: PeepholeOptimizer = None,
+        folder: ConstantFolder = None,
+        reducer: StrengthReducer = None,
+        index: SignatureIndex = None,
+        diagnostics_format: str = "text",
+        output_format: str = "text",
+    ):
+        self.tokenizer_cls = JackTokenizer()
+        self.comp_engine_cls = JackCompEngine(verbosity=verbosity)
+        self.symbol_table = None
+        self.code_generator = None
+        self.class_name = None
+        self.label_count = 0
+        self.optimizer = optimizer
+        self.folder = folder
+        self.reducer = reducer
+        # Signatures of the other classes of the project, None skips call checks
+        self.index = index
+        # "text" or "json", format of the reported errors
+        self.diagnostics_format = diagnostics_format
+        # "text" writes .vm files, "binary" the packed .vmb files
+        self.output_format = output_format
+
+    def compile_files(self, input_path: str, output_dir: str = None) -> list:
+        """
+        Compiles a jack file or every jack file in a directory.
+        Errors are reported per file, so one broken file doesnt stop the batch.
+
+        Args:
+            input_path (str): Jack file or directory containing jack files
+            output_dir (str): Directory for the vm files, defaults to next to the sources
+
+        Returns:
+            failures (list): (file path, diagnostics) pairs of the files that failed
+        """
+        if os.path.isdir(input_path):
+            file_paths = [
+                os.path.join(input_path, file_name)
+                for file_name in sorted(os.listdir(input_path))
+                if file_name.endswith(".jack")
+            ]
+        else:
+            file_paths = [input_path]
+
+        if self.index is not None:
+            self.index.update_files(file_paths)
+            self.index.save()
+
+        failures = []
+        for file in file_paths:
+            try:
+                self.compile_file(file, output_dir)
+            except Exception as error:  # pylint: disable=broad-except
+                diagnostics = collect_diagnostics(file, error)
+                failures.append((file, format_diagnostics(diagnostics, self.diagnostics_format)))
+
+        for _, diagnostics in failures:
+            print(diagnostics, file=sys.stderr)
+        return failures
+
+    def compile_file(self, file: str, output_dir: str = None) -> str:
+        """
+        Compiles a single jack file into a vm file in the configured output format.
+
+        Args:
+            file (str): Path of the jack file
+            output_dir (str): Directory for the vm file, defaults to next to the source
+
+        Returns:
+            vm_path (str): Path of the written vm file
+        """
+        tree = self.comp_engine_cls.parse([self.tokenizer_cls.tokenize(load_source(file))])
+        self.generate(tree)
+        file_name, _ = os.path.splitext(os.path.basename(file))
+        vm_dir = output_dir if output_dir is not None else os.path.dirname(file)
+        if vm_dir:
+            os.makedirs(vm_dir, exist_ok=True)
+        vm_path = os.path.join(vm_dir, file_name + FILE_EXTENSIONS[self.output_format])
+        write_program(vm_path, self.code_generator.get_instructions(), self.output_format)
+        return vm_path
+
+    def compile_source(self, source: str) -> list:
+        """
+        Compiles jack source code.
+
+        Args:
+            source (str): JACK source code of one class
+
+        Returns:
+            vm_lines (list): The VM code as a list of strings
+        """
+        return self.compile_tokens(self.tokenizer_cls.tokenize(strip_comments(source)))
+
+    def compile_tokens(self, tokens: list) -> list:
+        """
+        Parses the tokens of a class and generates its vm code.
+
+        Args:
+            tokens (list): Tokens of one class
+
+        Returns:
+            vm_lines (list): The VM code as a list of strings
+        """
+        return self.compile_tree(self.comp_engine_cls.parse([tokens]))
+
+    def compile_tree(self, tree) -> list:
+        """
+        Generates the vm code of a parsed class.
+
+        Args:
+            tree (ClassNode): Syntax tree of one class
+
+        Returns:
+            vm_lines (list): The VM code as a list of strings
+        """
+        self.generate(tree)
+        return self.code_generator.get_output()
+
+    def generate(self, tree):
+        """
+        Generates the instructions of a parsed class into a new code generator.
+
+        Args:
+            tree (ClassNode): Syntax tree of one class
+        """
+        if self.folder is not None:
+            tree = self.folder.fold(tree)
+        self.symbol_table = SymbolTable()
+        self.code_generator = CodeGenerator()
+        self.label_count = 0
+        self.compile_class(tree)
+        if self.optimizer is not None:
+            self.code_generator.set_instructions(
+                self.optimizer.optimize(self.code_generator.get_instructions())
+            )
+
+    ###############################
+    #  Class structure
+    ###############################
+    def compile_class(self, node):
+        """
+        Compiles a class.
+        """
+        self.class_name = node.name
+        for class_var_dec in node.class_var_decs:
+            for name in class_var_dec.names:
+                self.symbol_table.define(name, class_var_dec.type_name, class_var_dec.kind)
+        for subroutine_dec in node.subroutine_decs:
+            self.compile_subroutineDec(subroutine_dec)
+
+    def compile_subroutineDec(self, node):
+        """
+        Compiles a constructor, function or method.
+        """
+        self.symbol_table.start_subroutine()
+        if node.kind == "method":
+            self.symbol_table.define("this", self.class_name, "arg")
+        for type_, name in node.parameter_list.parameters:
+            self.symbol_table.define(name, type_, "arg")
+        for var_dec in node.body.var_decs:
+            for name in var_dec.names:
+                self.symbol_table.define(name, var_dec.type_name, "var")
+
+        self.code_generator.write_function(f"{self.class_name}.{node.name}", self.symbol_table.var_count("var"))
+        if node.kind == "constructor":
+            # Allocate the object and anchor this to it
+            self.code_generator.write_push("constant", self.symbol_table.var_count("field"))
+            self.code_generator.write_call("Memory.alloc", 1)
+            self.code_generator.write_pop("pointer", 0)
+        elif node.kind == "method":
+            # Anchor this to the object passed as the first argument
+            self.code_generator.write_push("argument", 0)
+            self.code_generator.write_pop("pointer", 0)
+        self.compile_statements(node.body.statements)
+
+    ###############################
+    #  Statements
+    ###############################
+    def compile_statements(self, node):
+        """
+        Compiles a sequence of statements.
+        """
+        for statement in node.children:
+            if isinstance(statement, LetStatement):
+                self.compile_let(statement)
+            elif isinstance(statement, IfStatement):
+                self.compile_if(statement)
+            elif isinstance(statement, WhileStatement):
+                self.compile_while(statement)
+            elif isinstance(statement, DoStatement):
+                self.compile_do(statement)
+            else:
+                self.compile_return(statement)
+
+    def compile_let(self, node):
+        """
+        Compiles a let statement.
+        """
+        segment, index = self.resolve_variable(node.name)
+        if node.index is None:
+            self.compile_expression(node.value)
+            self.code_generator.write_pop(segment, index)
+            return
+        # Array element, the value goes through temp 0 while that is anchored
+        self.code_generator.write_push(segment, index)
+        self.compile_expression(node.index)
+        self.code_generator.write_arithmetic("add")
+        self.compile_expression(node.value)
+        self.code_generator.write_pop("temp", 0)
+        self.code_generator.write_pop("pointer", 1)
+        self.code_generator.write_push("temp", 0)
+        self.code_generator.write_pop("that", 0)
+
+    def compile_if(self, node):
+        """
+        Compiles an if statement.
+        """
+        label_id = self.new_label_id()
+        false_label = f"IF_FALSE{label_id}"
+        end_label = f"IF_END{label_id}"
+
+        self.compile_expression(node.condition)
+        self.code_generator.write_arithmetic("not")
+        self.code_generator.write_if(false_label)
+        self.compile_statements(node.statements)
+        if node.else_statements is None:
+            self.code_generator.write_label(false_label)
+            return
+        self.code_generator.write_goto(end_label)
+        self.code_generator.write_label(false_label)
+        self.compile_statements(node.else_statements)
+        self.code_generator.write_label(end_label)
+
+    def compile_while(self, node):
+        """
+        Compiles a while statement.
+        """
+        label_id = self.new_label_id()
+        exp_label = f"WHILE_EXP{label_id}"
+        end_label = f"WHILE_END{label_id}"
+
+        self.code_generator.write_label(exp_label)
+        self.compile_expression(node.condition)
+        self.code_generator.write_arithmetic("not")
+        self.code_generator.write_if(end_label)
+        self.compile_statements(node.statements)
+        self.code_generator.write_goto(exp_label)
+        self.code_generator.write_label(end_label)
+
+    def compile_do(self, node):
+        """
+        Compiles a do statement, the returned value is thrown away.
+        """
+        self.compile_subroutineCall(node.call)
+        self.code_generator.write_pop("temp", 0)
+
+    def compile_return(self, node):
+        """
+        Compiles a return statement. Void subroutines return 0.
+        """
+        if node.value is None:
+            self.code_generator.write_push("constant", 0)
+        else:
+            self.compile_expression(node.value)
+        self.code_generator.write_return()
+
+    ###############################
+    #  Expressions
+    ###############################
+    def compile_expression(self, node):
+        """
+        Compiles an expression. Jack has no operator precedence, operators apply left to right.
+        """
+        operations = node.operations
+        if self.reducer is not None and operations and operations[0][0] == "*":
+            factor = term_value(node.first_term)
+            if factor is not None and term_value(operations[0][1]) is None:
+                # constant * x, multiplication commutes so x goes on the stack first
+                self.compile_term(operations[0][1])
+                if not self.reducer.multiply(self.code_generator, factor, self.class_name):
+                    self.compile_term(node.first_term)
+                    self.compile_op("*")
+                operations = operations[1:]
+            else:
+                self.compile_term(node.first_term)
+        else:
+            self.compile_term(node.first_term)
+
+        for op, term in operations:
+            if self.reducer is not None and op in OS_OPS and self.compile_reduced_op(op, term):
+                continue
+            self.compile_term(term)
+            self.compile_op(op)
+
+    def compile_reduced_op(self, op: str, term) -> bool:
+        """
+        Compiles a multiplication or division by a constant term without calling the OS.
+
+        Returns:
+            reduced (bool): False if nothing was written and the call is still needed
+        """
+        constant = term_value(term)
+        if constant is None:
+            return False
+        if op == "*":
+            return self.reducer.multiply(self.code_generator, constant, self.class_name)
+        return self.reducer.divide(self.code_generator, constant, self.class_name)
+
+    def compile_op(self, op: str):
+        """
+        Compiles a binary operator applied to the two topmost stack values.
+        """
+        if op in ARITHMETIC_OPS:
+            self.code_generator.write_arithmetic(ARITHMETIC_OPS[op])
+        else:
+            self.code_generator.write_call(OS_OPS[op], 2)
+
+    def compile_term(self, node):
+        """
+        Compiles a term.
+        """
+        first = node.children[0]
+        if isinstance(first, SubroutineCall):
+            self.compile_subroutineCall(first)
+            return
+
+        kind, value = first.kind, first.value
+        if kind == INT_CONST:
+            self.code_generator.write_push("constant", int(value))
+        elif kind == STRING_CONST:
+            self.compile_string(value[1:-1])
+        elif kind == KEYWORD:
+            self.compile_keyword_constant(value)
+        elif kind == IDENTIFIER:
+            segment, index = self.resolve_variable(value)
+            self.code_generator.write_push(segment, index)
+            if len(node.children) > 1:
+                # Array element
+                self.compile_expression(node.children[2])
+                self.code_generator.write_arithmetic("add")
+                self.code_generator.write_pop("pointer", 1)
+                self.code_generator.write_push("that", 0)
+        elif value == "(":
+            self.compile_expression(node.children[1])
+        else:
+            # Unary operator
+            self.compile_term(node.children[1])
+            self.code_generator.write_arithmetic(UNARY_COMMANDS[value])
+
+    def compile_string(self, string: str):
+        """
+        Compiles a string constant into a String.new call followed by appendChar calls.
+        """
+        self.code_generator.write_push("constant", len(string))
+        self.code_generator.write_call("String.new", 1)
+        for char in string:
+            self.code_generator.write_push("constant", ord(char))
+            self.code_generator.write_call("String.appendChar", 2)
+
+    def compile_keyword_constant(self, keyword: str):
+        """
+        Compiles true, false, null or this.
+        """
+        if keyword == "this":
+            self.code_generator.write_push("pointer", 0)
+        else:
+            self.code_generator.write_push("constant", 0)
+            if keyword == "true":
+                self.code_generator.write_arithmetic("not")
+
+    def compile_subroutineCall(self, node):
+        """
+        Compiles a subroutine call, pushing the object first for method calls.
+        """
+        receiver = node.receiver
+        arguments = node.arguments
+        n_args = len(arguments)
+        symbol = self.symbol_table.resolve(receiver) if receiver is not None else None
+        if receiver is None:
+            class_name = self.class_name
+        elif symbol is not None:
+            class_name = symbol.type
+        else:
+            class_name = receiver
+        signature = self.check_call(class_name, node.name, n_args)
+
+        if receiver is None and signature is not None and signature.kind != "method":
+            # Function or constructor of the current class called without the class name
+            name = f"{self.class_name}.{node.name}"
+        elif receiver is None:
+            # Method of the current object
+            self.code_generator.write_push("pointer", 0)
+            n_args += 1
+            name = f"{self.class_name}.{node.name}"
+        elif symbol is not None:
+            # Method of an object stored in a variable
+            if signature is not None and signature.kind != "method":
+                raise TypeError(
+                    f"{signature.kind.capitalize()} {class_name}.{node.name} called as a method in class {self.class_name}."
+                )
+            self.code_generator.write_push(SEGMENTS[symbol.kind], symbol.index)
+            n_args += 1
+            name = f"{symbol.type}.{node.name}"
+        else:
+            # Function or constructor of a class
+            if signature is not None and signature.kind == "method":
+                raise TypeError(f"Method {receiver}.{node.name} called as a function in class {self.class_name}.")
+            name = f"{receiver}.{node.name}"
+
+        for argument in arguments:
+            self.compile_expression(argument)
+        self.code_generator.write_call(name, n_args)
+
+    ###############################
+    #  Helpers
+    ###############################
+    def resolve_variable(self, name: str) -> tuple:
+        """
+        Looks up the memory segment and index of a variable.
+
+        Args:
+            name (str): Variable name
+
+        Returns:
+            location (tuple): (segment, index) of the variable
+        """
+        symbol = self.symbol_table.resolve(name)
+        if symbol is None:
+            raise NameError(f"Undefined variable '{name}' in class {self.class_name}.")
+        return SEGMENTS[symbol.kind], symbol.index
+
+    def check_call(self, class_name: str, subroutine: str, n_args: int):
+        """
+        Looks up the signature of a called subroutine and checks the argument count.
+
+        Args:
+            class_name (str): Class the subroutine belongs to
+            subroutine (str): Name of the subroutine
+            n_args (int): Number of arguments passed, without the object of a method call
+
+        Returns:
+            signature (Signature): Kind and parameter count, None if the class isnt indexed
+        """
+        if self.index is None or class_name not in self.index.classes:
+            return None
+        signature = self.index.lookup(class_name, subroutine)
+        if signature is None:
+            raise NameError(f"Undefined subroutine {class_name}.{subroutine} called in class {self.class_name}.")
+        if signature.n_args != n_args:
+            raise TypeError(
+                f"{class_name}.{subroutine} takes {signature.n_args} arguments, "
+                f"{n_args} given in class {self.class_name}."
+            )
+        return signature
+
+    def new_label_id(self) -> int:
+        """
+        Returns a label number that is unique within the class.
+        """
+        label_id = self.label_count
+        self.label_count += 1
+        return label_id
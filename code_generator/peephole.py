@@ -0,0 +1,188 @@
+"""This module contains the peephole optimizer run over generated vm code"""
+from collections import Counter, namedtuple
+
+# A rewrite rule over a window of consecutive instructions.
+# rewrite gets the window and returns the replacement list, or None if the rule doesnt apply.
+Pattern = namedtuple("Pattern", ["name", "size", "rewrite"])
+
+# Commands after which execution never falls through
+JUMPS = ("goto", "return")
+# Commands that can be reached by a jump
+ENTRY_POINTS = ("label", "function")
+# Instructions that always leave 0 or -1 on the stack
+BOOLEAN_CONDITIONS = (("eq",), ("gt",), ("lt",), ("push", "constant", 0))
+
+
+def rewrite_push_pop(window):
+    """
+    push x / pop x leaves the stack and x unchanged.
+    """
+    push, pop = window
+    if push[0] == "push" and pop[0] == "pop" and push[1:] == pop[1:]:
+        return []
+    return None
+
+
+def rewrite_goto_label(window):
+    """
+    goto L straight before label L falls through anyway.
+    """
+    goto, label = window
+    if goto[0] == "goto" and label[0] == "label" and goto[1] == label[1]:
+        return [label]
+    return None
+
+
+def rewrite_double_not(window):
+    """
+    not / not cancels out.
+    """
+    if window[0] == ("not",) and window[1] == ("not",):
+        return []
+    return None
+
+
+def rewrite_constant_branch(window):
+    """
+    if-goto on a pushed constant is either never taken or always taken.
+    """
+    push, branch = window
+    if push[0] == "push" and push[1] == "constant" and branch[0] == "if-goto":
+        return [("goto", branch[1])] if push[2] != 0 else []
+    return None
+
+
+def rewrite_true_branch(window):
+    """
+    push constant 0 / not / if-goto L is true, so it always jumps.
+    """
+    push, negate, branch = window
+    if push == ("push", "constant", 0) and negate == ("not",) and branch[0] == "if-goto":
+        return [("goto", branch[1])]
+    return None
+
+
+def rewrite_negated_branch(window):
+    """
+    not / if-goto L1 / goto L2 / label L1 jumps to L2 when the condition is true.
+    not is bitwise and if-goto jumps on any nonzero value, so this only holds
+    when the condition is a boolean, i.e. made by a comparison or false.
+    """
+    condition, negate, branch, goto, label = window
+    if (
+        condition in BOOLEAN_CONDITIONS
+        and negate == ("not",)
+        and branch[0] == "if-goto"
+        and goto[0] == "goto"
+        and label[0] == "label"
+        and branch[1] == label[1]
+    ):
+        return [condition, ("if-goto", goto[1]), label]
+    return None
+
+
+def rewrite_dead_code(window):
+    """
+    Code after goto or return is unreachable until the next label or function.
+    """
+    jump, instruction = window
+    if jump[0] in JUMPS and instruction[0] not in ENTRY_POINTS:
+        return [jump]
+    return None
+
+
+PATTERNS = {
+    pattern.name: pattern for pattern in [
+        Pattern("push_pop", 2, rewrite_push_pop),
+        Pattern("goto_label", 2, rewrite_goto_label),
+        Pattern("double_not", 2, rewrite_double_not),
+        Pattern("constant_branch", 2, rewrite_constant_branch),
+        Pattern("true_branch", 3, rewrite_true_branch),
+        Pattern("negated_branch", 5, rewrite_negated_branch),
+        Pattern("dead_code", 2, rewrite_dead_code),
+    ]
+}
+
+
+class PeepholeOptimizer:
+    """
+    Rewrites short instruction sequences into cheaper ones.
+    Every instruction is appended to the output and the patterns are
+    matched against the tail of the output, so a rewrite that exposes a
+    new match is picked up in the same pass.
+    """
+    def __init__(self, patterns=None):
+        """
+        Args:
+            patterns (list): Pattern names or Pattern objects, defaults to every built in pattern
+        """
+        if patterns is None:
+            patterns = list(PATTERNS)
+        self.patterns = [PATTERNS[pattern] if isinstance(pattern, str) else pattern for pattern in patterns]
+        self.stats = Counter()
+        self.instructions_in = 0
+        self.instructions_out = 0
+
+    def optimize(self, instructions: list) -> list:
+        """
+        Optimizes a list of instructions.
+
+        Args:
+            instructions (list): The VM code as a list of (command, *arguments) tuples
+
+        Returns:
+            optimized (list): The optimized instructions
+        """
+        output = []
+        for instruction in instructions:
+            output.append(instruction)
+            self.rewrite_tail(output)
+
+        self.instructions_in += len(instructions)
+        self.instructions_out += len(output)
+        return output
+
+    def rewrite_tail(self, output: list):
+        """
+        Applies the patterns to the end of the output until none match.
+        """
+        changed = True
+        while changed and output:
+            changed = False
+            for pattern in self.patterns:
+                if len(output) < pattern.size:
+                    continue
+                replacement = pattern.rewrite(output[-pattern.size:])
+                if replacement is None:
+                    continue
+                output[-pattern.size:] = replacement
+                self.stats[pattern.name] += 1
+                changed = True
+                break
+
+    def report(self) -> dict:
+        """
+        Returns the optimization statistics.
+
+        Returns:
+            report (dict): Instruction counts before and after, and hits per pattern
+        """
+        return {
+            "instructions_in": self.instructions_in,
+            "instructions_out": self.instructions_out,
+            "removed": self.instructions_in - self.instructions_out,
+            "patterns": dict(self.stats),
+        }
+
+    def format_report(self) -> str:
+        """
+        Returns the optimization statistics as text.
+        """
+        report = self.report()
+        lines = [
+            f"peephole: {report['instructions_in']} -> {report['instructions_out']} instructions "
+            f"({report['removed']} removed)"
+        ]
+        for name, hits in sorted(report["patterns"].items()):
+            lines.append(f"  {name}: {hits}")
+        return "\n".join(lines)
@@ -0,0 +1,200 @@
+"""This module keeps a project wide index of the class signatures used to resolve calls"""
+import json
+import os
+from collections import namedtuple
+from syntax_analyzer import config
+from syntax_analyzer.jack_token import SYMBOL
+from syntax_analyzer.jack_tokenizer import JackTokenizer
+from syntax_analyzer.source_reader import load_source
+
+# Index file name, kept in the root directory of the project by default
+DEFAULT_INDEX_PATH = ".jack_index.json"
+
+# Kind ("constructor", "function" or "method") and number of declared parameters
+Signature = namedtuple("Signature", ["kind", "n_args"])
+# Number of fields and statics, and the signature of every subroutine by name
+ClassSignature = namedtuple("ClassSignature", ["fields", "statics", "subroutines"])
+
+
+def scan_signature(tokens: list) -> tuple:
+    """
+    Extracts the signature of a class from its tokens without parsing the
+    subroutine bodies, which are skipped by counting braces.
+
+    Args:
+        tokens (list): Tokens of one class
+
+    Returns:
+        signature (tuple): Class name and ClassSignature
+    """
+    if len(tokens) < 3 or tokens[0].value != "class":
+        raise SyntaxError("Expected 'class' keyword at the beginning of the class definition.")
+    class_name = tokens[1].value
+    counts = {"field": 0, "static": 0}
+    subroutines = {}
+    index = 3
+    while tokens[index].value != "}":
+        value = tokens[index].value
+        if value in config.CLASS_VAR_DEC_FIRST:
+            # kind type name (',' name)* ';'
+            end = index + 2
+            while tokens[end].value != ";":
+                end += 1
+            counts[value] += (end - index - 1) // 2
+            index = end + 1
+        elif value in config.SUBROUTINE_DEC_FIRST:
+            # kind type name '(' (type name (',' type name)*)? ')' '{' body '}'
+            name = tokens[index + 2].value
+            end = index + 4
+            while tokens[end].value != ")":
+                end += 1
+            n_params = (end - index - 4 + 1) // 3
+            subroutines[name] = Signature(value, n_params)
+            # Skip the body
+            index = end + 1
+            depth = 0
+            while True:
+                token = tokens[index]
+                if token.kind == SYMBOL and token.value == "{":
+                    depth += 1
+                elif token.kind == SYMBOL and token.value == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                index += 1
+            index += 1
+        else:
+            raise SyntaxError(f"Unexpected '{value}' in class {class_name}.")
+    return class_name, ClassSignature(counts["field"], counts["static"], subroutines)
+
+
+class SignatureIndex:
+    """
+    Signatures of every class of a project, kept on disk between runs.
+    Files are only read again when their mtime or size changed, so a run
+    that touches one file doesnt rescan the whole project.
+    Signatures are stored per file, and calls are only resolved against the
+    classes of the files passed to the last update_files, so projects that
+    share an index file or a class name dont see each other.
+    """
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """
+        Args:
+            path (str): Index file, None keeps the index in memory only
+        """
+        self.path = path
+        self.tokenizer = JackTokenizer()
+        # absolute file path -> [mtime_ns, size, class name]
+        self.files = {}
+        # absolute file path -> ClassSignature
+        self.signatures = {}
+        # class name -> ClassSignature of the files being compiled
+        self.classes = {}
+        self.scanned = 0
+        self.load()
+
+    def load(self):
+        """
+        Loads the index file. An index from another compiler version is dropped.
+        """
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as index_file:
+                index = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return
+        if index.get("version") != config.COMPILER_VERSION or "signatures" not in index:
+            return
+        self.files = index["files"]
+        self.signatures = {
+            file: ClassSignature(
+                fields, statics,
+                {name: Signature(kind, n_args) for name, (kind, n_args) in subroutines.items()},
+            )
+            for file, (fields, statics, subroutines) in index["signatures"].items()
+        }
+
+    def save(self):
+        """
+        Writes the index file.
+        """
+        if self.path is None:
+            return
+        index = {
+            "version": config.COMPILER_VERSION,
+            "files": self.files,
+            "signatures": self.signatures,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as index_file:
+            # Namedtuples are written as plain lists
+            json.dump(index, index_file, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def update_files(self, file_paths: list):
+        """
+        Brings the index up to date with a set of files, forgets files that
+        no longer exist, and makes the classes of the set the ones calls are
+        resolved against.
+
+        Args:
+            file_paths (list): Paths of the jack files
+        """
+        for file in file_paths:
+            self.update_file(file)
+        for file in [file for file in self.files if not os.path.exists(file)]:
+            self.forget(file)
+        self.classes = {}
+        for file in map(os.path.abspath, file_paths):
+            if file in self.files:
+                self.classes[self.files[file][2]] = self.signatures[file]
+
+    def update_file(self, file: str):
+        """
+        Rescans a file if it changed since it was indexed.
+        Files that dont scan are left out, the compile step reports their errors.
+
+        Args:
+            file (str): Path of the jack file
+        """
+        file = os.path.abspath(file)
+        try:
+            stat = os.stat(file)
+        except OSError:
+            self.forget(file)
+            return
+        entry = self.files.get(file)
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return
+        try:
+            class_name, signature = scan_signature(self.tokenizer.tokenize(load_source(file)))
+        except (OSError, SyntaxError, IndexError, UnicodeDecodeError):
+            self.forget(file)
+            return
+        self.scanned += 1
+        self.files[file] = [stat.st_mtime_ns, stat.st_size, class_name]
+        self.signatures[file] = signature
+
+    def forget(self, file: str):
+        """
+        Removes a file and its signature from the index.
+        """
+        self.files.pop(file, None)
+        self.signatures.pop(file, None)
+
+    def lookup(self, class_name: str, subroutine: str):
+        """
+        Finds the signature of a subroutine.
+
+        Args:
+            class_name (str): Name of the class
+            subroutine (str): Name of the subroutine
+
+        Returns:
+            signature (Signature): Kind and parameter count, None if the class or subroutine is unknown
+        """
+        class_signature = self.classes.get(class_name)
+        if class_signature is None:
+            return None
+        return class_signature.subroutines.get(subroutine)
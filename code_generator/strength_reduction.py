@@ -0,0 +1,125 @@
+"""This module replaces Math.multiply and Math.divide calls by constants with cheaper vm code"""
+from collections import Counter, defaultdict
+
+# Longest inline sequence that may replace a single OS call
+DEFAULT_MAX_INSTRUCTIONS = 20
+
+# Temp registers used by the inline sequences. They are only live inside a
+# sequence, which never contains other expression code.
+SCRATCH_REGISTER = 0
+OPERAND_REGISTER = 1
+
+
+def multiply_cost(factor: int) -> int:
+    """
+    Returns the number of instructions the inline multiplication by |factor| takes.
+    """
+    factor = abs(factor)
+    if factor <= 1:
+        return 0 if factor == 1 else 2
+    bits = bin(factor)[2:]
+    doublings = 4 * (len(bits) - 1)
+    if bits.count("1") == 1:
+        # Powers of two only double
+        return doublings
+    return 2 + doublings + 2 * (bits.count("1") - 1)
+
+
+class StrengthReducer:
+    """
+    Replaces multiplications by small constants with doubling and add
+    sequences and removes divisions by one.
+    """
+    def __init__(self, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS):
+        """
+        Args:
+            max_instructions (int): Longest inline sequence that may replace a call
+        """
+        self.max_instructions = max_instructions
+        # class name -> Counter of eliminated calls per OS function
+        self.eliminated = defaultdict(Counter)
+
+    def multiply(self, code_generator, factor: int, class_name: str) -> bool:
+        """
+        Multiplies the value on top of the stack by a constant.
+
+        Args:
+            code_generator (CodeGenerator): Generator the code is written to
+            factor (int): Constant factor
+            class_name (str): Class being compiled, used for the report
+
+        Returns:
+            reduced (bool): False if the call is cheaper and nothing was written
+        """
+        cost = multiply_cost(factor) + (1 if factor < 0 else 0)
+        if cost > self.max_instructions:
+            return False
+
+        magnitude = abs(factor)
+        if magnitude == 0:
+            # The operand was still evaluated for its side effects
+            code_generator.write_pop("temp", SCRATCH_REGISTER)
+            code_generator.write_push("constant", 0)
+        elif magnitude > 1:
+            bits = bin(magnitude)[2:]
+            if bits.count("1") > 1:
+                code_generator.write_pop("temp", OPERAND_REGISTER)
+                code_generator.write_push("temp", OPERAND_REGISTER)
+            for bit in bits[1:]:
+                self.write_double(code_generator)
+                if bit == "1":
+                    code_generator.write_push("temp", OPERAND_REGISTER)
+                    code_generator.write_arithmetic("add")
+        if factor < 0:
+            code_generator.write_arithmetic("neg")
+
+        self.eliminated[class_name]["Math.multiply"] += 1
+        return True
+
+    def divide(self, code_generator, divisor: int, class_name: str) -> bool:
+        """
+        Divides the value on top of the stack by a constant.
+        Only 1 and -1 are reduced, the vm has no shifts for other powers of two.
+
+        Args:
+            code_generator (CodeGenerator): Generator the code is written to
+            divisor (int): Constant divisor
+            class_name (str): Class being compiled, used for the report
+
+        Returns:
+            reduced (bool): False if the call is still needed and nothing was written
+        """
+        if divisor not in (1, -1):
+            return False
+        if divisor == -1:
+            code_generator.write_arithmetic("neg")
+        self.eliminated[class_name]["Math.divide"] += 1
+        return True
+
+    def write_double(self, code_generator):
+        """
+        Doubles the value on top of the stack.
+        """
+        code_generator.write_pop("temp", SCRATCH_REGISTER)
+        code_generator.write_push("temp", SCRATCH_REGISTER)
+        code_generator.write_push("temp", SCRATCH_REGISTER)
+        code_generator.write_arithmetic("add")
+
+    def report(self) -> dict:
+        """
+        Returns the number of eliminated calls per class.
+
+        Returns:
+            report (dict): class name -> {OS function: eliminated calls}
+        """
+        return {class_name: dict(counts) for class_name, counts in sorted(self.eliminated.items())}
+
+    def format_report(self) -> str:
+        """
+        Returns the number of eliminated calls per class as text.
+        """
+        lines = [f"strength reduction (max {self.max_instructions} instructions per call):"]
+        for class_name, counts in self.report().items():
+            calls = ", ".join(f"{name}: {count}" for name, count in sorted(counts.items()))
+            lines.append(f"  {class_name}: {calls}")
+        return "\n".join(lines)
@@ -1,11 +1,31 @@
+from collections import namedtuple
+
+# Compact symbol table entry
+Symbol = namedtuple("Symbol", ["kind", "type", "index"])
+
+
+class Scope:
+    """
+    Single scope of a symbol table, linked to the scope that encloses it.
+    """
+    __slots__ = ("symbols", "parent")
+
+    def __init__(self, parent=None):
+        self.symbols = {}
+        self.parent = parent
+
+
 class SymbolTable:
     """
     Manages a symbol table for Jack compilation.
+    Scopes form a linked list from the innermost scope to the class scope,
+    lookups walk it starting with the innermost scope.
     """
     def __init__(self):
-        # Separate tables for class-level and subroutine-level symbols
-        self.class_table = {}
-        self.subroutine_table = {}
+        # Class-level scope and the scope of the current subroutine
+        self.class_scope = Scope()
+        self.subroutine_scope = Scope(self.class_scope)
+        self.current_scope = self.subroutine_scope
         self.index_counters = {
             "static": 0,
             "field": 0,
@@ -13,14 +33,44 @@ class SymbolTable:
             "var": 0
         }
 
+    @property
+    def class_table(self):
+        """
+        Returns the class-level symbols.
+        """
+        return self.class_scope.symbols
+
+    @property
+    def subroutine_table(self):
+        """
+        Returns the symbols of the outermost subroutine scope.
+        """
+        return self.subroutine_scope.symbols
+
     def start_subroutine(self):
         """
-        Resets the subroutine-level symbol table.
+        Resets the subroutine-level symbol table. The class scope is kept as is.
         """
-        self.subroutine_table = {}
+        self.subroutine_scope = Scope(self.class_scope)
+        self.current_scope = self.subroutine_scope
         self.index_counters["arg"] = 0
         self.index_counters["var"] = 0
 
+    def push_scope(self):
+        """
+        Opens a nested scope inside the current one.
+        Variables keep counting up, so nested scopes share the subroutine's local segment.
+        """
+        self.current_scope = Scope(self.current_scope)
+
+    def pop_scope(self):
+        """
+        Closes the innermost nested scope.
+        """
+        if self.current_scope is self.subroutine_scope:
+            raise ValueError("Cannot close the subroutine scope.")
+        self.current_scope = self.current_scope.parent
+
     def define(self, name, type_, kind):
         """
         Defines a new identifier and adds it to the appropriate symbol table.
@@ -31,11 +81,12 @@ class SymbolTable:
             kind (str): The kind of the identifier ('static', 'field', 'arg', 'var').
         """
         if kind in ["static", "field"]:
-            self.class_table[name] = {"type": type_, "kind": kind, "index": self.index_counters[kind]}
+            scope = self.class_scope
         elif kind in ["arg", "var"]:
-            self.subroutine_table[name] = {"type": type_, "kind": kind, "index": self.index_counters[kind]}
+            scope = self.current_scope
         else:
             raise ValueError(f"Invalid kind: {kind}")
+        scope.symbols[name] = Symbol(kind, type_, self.index_counters[kind])
         self.index_counters[kind] += 1
 
     def var_count(self, kind):
@@ -50,6 +101,24 @@ class SymbolTable:
         """
         return self.index_counters[kind]
 
+    def resolve(self, name):
+        """
+        Looks up an identifier, starting with the innermost scope.
+
+        Args:
+            name (str): The name of the identifier.
+
+        Returns:
+            Symbol: The kind, type and index of the identifier, or None if not found.
+        """
+        scope = self.current_scope
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
+
     def kind_of(self, name):
         """
         Returns the kind of the identifier.
@@ -60,11 +129,8 @@ class SymbolTable:
         Returns:
             str: The kind of the identifier, or None if not found.
         """
-        if name in self.subroutine_table:
-            return self.subroutine_table[name]["kind"]
-        elif name in self.class_table:
-            return self.class_table[name]["kind"]
-        return None
+        symbol = self.resolve(name)
+        return symbol.kind if symbol is not None else None
 
     def type_of(self, name):
         """
@@ -76,11 +142,8 @@ class SymbolTable:
         Returns:
             str: The type of the identifier, or None if not found.
         """
-        if name in self.subroutine_table:
-            return self.subroutine_table[name]["type"]
-        elif name in self.class_table:
-            return self.class_table[name]["type"]
-        return None
+        symbol = self.resolve(name)
+        return symbol.type if symbol is not None else None
 
     def index_of(self, name):
         """
@@ -92,8 +155,5 @@ class SymbolTable:
         Returns:
             int: The index of the identifier, or None if not found.
         """
-        if name in self.subroutine_table:
-            return self.subroutine_table[name]["index"]
-        elif name in self.class_table:
-            return self.class_table[name]["index"]
-        return None
\ No newline at end of file
+        symbol = self.resolve(name)
+        return symbol.index if symbol is not None else None
@@ -0,0 +1,243 @@
+"""This module packs vm instructions into a compact binary form and reads them back"""
+import struct
+import sys
+from array import array
+
+###############################
+#  Instruction set
+###############################
+OPCODES = (
+    "push", "pop",
+    "add", "sub", "neg", "eq", "gt", "lt", "and", "or", "not",
+    "label", "goto", "if-goto",
+    "function", "call", "return",
+)
+OPCODE_IDS = {command: opcode for opcode, command in enumerate(OPCODES)}
+SEGMENTS = ("constant", "argument", "local", "static", "this", "that", "pointer", "temp")
+SEGMENT_IDS = {segment: segment_id for segment_id, segment in enumerate(SEGMENTS)}
+
+PUSH, POP = OPCODE_IDS["push"], OPCODE_IDS["pop"]
+LABEL, GOTO, IF_GOTO = OPCODE_IDS["label"], OPCODE_IDS["goto"], OPCODE_IDS["if-goto"]
+FUNCTION, CALL, RETURN = OPCODE_IDS["function"], OPCODE_IDS["call"], OPCODE_IDS["return"]
+# Commands whose first argument is a label or function name
+NAMED = frozenset([LABEL, GOTO, IF_GOTO, FUNCTION, CALL])
+
+# Every instruction takes two unsigned 32 bit words:
+#   word 0: opcode in the low byte, segment id (push, pop) or count (function, call) above it
+#   word 1: segment index (push, pop) or name id (label, goto, if-goto, function, call)
+WORD_TYPECODE = "I"
+WORDS_PER_INSTRUCTION = 2
+OPCODE_BITS = 8
+OPCODE_MASK = (1 << OPCODE_BITS) - 1
+
+###############################
+#  Binary file layout
+###############################
+# Magic, byte length of the name table, number of code words. The name
+# table is the names joined by newlines, the code words follow it little endian.
+MAGIC = b"JVMB"
+HEADER = struct.Struct("<4sII")
+
+OUTPUT_FORMATS = ["text", "binary"]
+FILE_EXTENSIONS = {"text": ".vm", "binary": ".vmb"}
+
+
+class VmProgram:
+    """
+    VM instructions encoded as opcode, segment id or count, and operand.
+    Label and function names are stored once in a name table and referred
+    to by id, so a program takes 8 bytes per instruction in memory and on disk.
+    """
+    def __init__(self, names: list = None, code: array = None):
+        """
+        Args:
+            names (list): Name table, indexed by name id
+            code (array): Encoded instructions, two words each
+        """
+        self.names = names if names is not None else []
+        self.name_ids = {name: name_id for name_id, name in enumerate(self.names)}
+        self.code = code if code is not None else array(WORD_TYPECODE)
+
+    @classmethod
+    def from_instructions(cls, instructions):
+        """
+        Encodes (command, *arguments) tuples such as CodeGenerator.get_instructions returns.
+
+        Args:
+            instructions (iterable): The VM code as (command, *arguments) tuples
+
+        Returns:
+            program (VmProgram): The encoded program
+        """
+        program = cls()
+        for instruction in instructions:
+            program.append(instruction)
+        return program
+
+    @classmethod
+    def from_text(cls, lines):
+        """
+        Encodes vm code in the text format, e.g. the lines of a .vm file.
+        Blank lines and // comments are skipped.
+
+        Args:
+            lines (iterable): Lines of vm code
+
+        Returns:
+            program (VmProgram): The encoded program
+        """
+        program = cls()
+        for line in lines:
+            line = line.split("//", 1)[0].split()
+            if not line:
+                continue
+            if len(line) == 3 and line[0] in ("push", "pop", "function", "call"):
+                line[2] = int(line[2])
+            program.append(tuple(line))
+        return program
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Reads a program in the binary format.
+
+        Args:
+            data (bytes): Contents of a .vmb file
+
+        Returns:
+            program (VmProgram): The decoded program
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated binary vm file.")
+        magic, names_size, n_words = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a binary vm file.")
+        names_end = HEADER.size + names_size
+        code_end = names_end + n_words * array(WORD_TYPECODE).itemsize
+        if len(data) < code_end:
+            raise ValueError("Truncated binary vm file.")
+        names_blob = bytes(data[HEADER.size:names_end]).decode()
+        code = array(WORD_TYPECODE)
+        code.frombytes(data[names_end:code_end])
+        if sys.byteorder == "big":
+            code.byteswap()
+        return cls(names_blob.split("\n") if names_blob else [], code)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the program in the binary format.
+
+        Returns:
+            data (bytes): Header, name table and code words
+        """
+        names_blob = "\n".join(self.names).encode()
+        code = self.code
+        if sys.byteorder == "big":
+            code = array(WORD_TYPECODE, code)
+            code.byteswap()
+        return HEADER.pack(MAGIC, len(names_blob), len(code)) + names_blob + code.tobytes()
+
+    def to_text(self) -> list:
+        """
+        Serializes the program in the text format.
+
+        Returns:
+            vm_lines (list): The VM code as a list of strings
+        """
+        return [" ".join(map(str, instruction)) for instruction in self]
+
+    def name_id(self, name: str) -> int:
+        """
+        Returns the id of a name, adding it to the name table if it is new.
+        """
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, instruction: tuple):
+        """
+        Encodes one instruction at the end of the program.
+
+        Args:
+            instruction (tuple): (command, *arguments) tuple
+        """
+        command = instruction[0]
+        opcode = OPCODE_IDS.get(command)
+        if opcode is None:
+            raise ValueError(f"Unknown vm command: {command}")
+        if opcode == PUSH or opcode == POP:
+            segment_id = SEGMENT_IDS.get(instruction[1])
+            if segment_id is None:
+                raise ValueError(f"Unknown vm segment: {instruction[1]}")
+            self.code.extend((opcode | segment_id << OPCODE_BITS, int(instruction[2])))
+        elif opcode == FUNCTION or opcode == CALL:
+            self.code.extend((opcode | int(instruction[2]) << OPCODE_BITS, self.name_id(instruction[1])))
+        elif opcode in NAMED:
+            self.code.extend((opcode, self.name_id(instruction[1])))
+        else:
+            self.code.extend((opcode, 0))
+
+    def decode(self, position: int) -> tuple:
+        """
+        Decodes the instruction at a position back into a (command, *arguments) tuple.
+
+        Args:
+            position (int): Index of the instruction
+
+        Returns:
+            instruction (tuple): The decoded instruction
+        """
+        head = self.code[position * WORDS_PER_INSTRUCTION]
+        operand = self.code[position * WORDS_PER_INSTRUCTION + 1]
+        opcode, argument = head & OPCODE_MASK, head >> OPCODE_BITS
+        command = OPCODES[opcode]
+        if opcode == PUSH or opcode == POP:
+            return command, SEGMENTS[argument], operand
+        if opcode == FUNCTION or opcode == CALL:
+            return command, self.names[operand], argument
+        if opcode in NAMED:
+            return command, self.names[operand]
+        return (command,)
+
+    def __len__(self):
+        return len(self.code) // WORDS_PER_INSTRUCTION
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.decode(position)
+
+
+def write_program(path: str, instructions, output_format: str = "text"):
+    """
+    Writes vm code in one of OUTPUT_FORMATS.
+
+    Args:
+        path (str): Path of the output file
+        instructions (iterable): The VM code as (command, *arguments) tuples
+        output_format (str): "text" for a .vm file, "binary" for a .vmb file
+    """
+    if output_format == "binary":
+        with open(path, "wb") as vm_file:
+            vm_file.write(VmProgram.from_instructions(instructions).to_bytes())
+        return
+    with open(path, "w") as vm_file:
+        vm_file.write("\n".join(" ".join(map(str, instruction)) for instruction in instructions) + "\n")
+
+
+def read_program(path: str) -> VmProgram:
+    """
+    Reads a vm file in either format, binary files are recognized by their magic.
+
+    Args:
+        path (str): Path of a .vm or .vmb file
+
+    Returns:
+        program (VmProgram): The encoded program
+    """
+    with open(path, "rb") as vm_file:
+        data = vm_file.read()
+    if data.startswith(MAGIC):
+        return VmProgram.from_bytes(data)
+    return VmProgram.from_text(data.decode().splitlines())
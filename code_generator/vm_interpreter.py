@@ -0,0 +1,608 @@
+"""This module runs generated vm code in process, with a minimal jack OS"""
+from array import array
+from .vm_encoding import (
+    VmProgram, SEGMENTS, OPCODE_BITS, OPCODE_MASK, WORDS_PER_INSTRUCTION,
+    PUSH, POP, LABEL, GOTO, IF_GOTO, FUNCTION, CALL, RETURN, OPCODE_IDS,
+)
+
+###############################
+#  Memory map of the Hack platform
+###############################
+RAM_SIZE = 32768
+# THIS and THAT live in RAM, so pointer 0 and 1 address them directly
+THIS_ADDRESS = 3
+THAT_ADDRESS = 4
+TEMP_BASE = 5
+STATIC_BASE = 16
+STATIC_END = 256
+STACK_BASE = 256
+HEAP_BASE = 2048
+HEAP_END = 16384
+
+DEFAULT_MAX_INSTRUCTIONS = 10_000_000
+
+# Jack character codes that differ from ascii
+NEW_LINE = 128
+BACKSPACE = 129
+DOUBLE_QUOTE = 34
+
+###############################
+#  Pre-decoded opcodes
+###############################
+# push and pop are split per segment when the code is loaded, and labels are
+# dropped, so the run loop never looks at a segment or a name.
+(
+    PUSH_CONSTANT, PUSH_LOCAL, PUSH_ARGUMENT, PUSH_THIS, PUSH_THAT, PUSH_RAM,
+    POP_LOCAL, POP_ARGUMENT, POP_THIS, POP_THAT, POP_RAM,
+    ADD, SUB, NEG, EQ, GT, LT, AND, OR, NOT,
+    JUMP, JUMP_IF, CALL_VM, CALL_OS, ENTER, LEAVE,
+) = range(26)
+
+PUSH_OPS = {"local": PUSH_LOCAL, "argument": PUSH_ARGUMENT, "this": PUSH_THIS, "that": PUSH_THAT}
+POP_OPS = {"local": POP_LOCAL, "argument": POP_ARGUMENT, "this": POP_THIS, "that": POP_THAT}
+ARITHMETIC_OPS = {
+    OPCODE_IDS["add"]: ADD, OPCODE_IDS["sub"]: SUB, OPCODE_IDS["neg"]: NEG,
+    OPCODE_IDS["eq"]: EQ, OPCODE_IDS["gt"]: GT, OPCODE_IDS["lt"]: LT,
+    OPCODE_IDS["and"]: AND, OPCODE_IDS["or"]: OR, OPCODE_IDS["not"]: NOT,
+}
+
+# Return address of the entry function, returning to it ends the run
+EXIT_ADDRESS = -1
+
+
+def to_word(value: int) -> int:
+    """
+    Wraps an int into the signed 16 bit range of the Hack platform.
+    """
+    return ((value + 32768) & 0xFFFF) - 32768
+
+
+class Halt(Exception):
+    """
+    Raised by Sys.halt to stop the program.
+    """
+
+
+class JackOs:
+    """
+    Minimal stand in for the jack OS, enough to run programs without a screen
+    or keyboard. Strings and arrays live on the heap like in the real OS, and
+    everything printed is collected in output.
+    """
+    def __init__(self, ram: list):
+        """
+        Args:
+            ram (list): Memory shared with the interpreter
+        """
+        self.ram = ram
+        self.heap_pointer = HEAP_BASE
+        # Block size -> addresses of freed blocks of that size
+        self.free_blocks = {}
+        self.output = []
+
+    def reset(self):
+        """
+        Empties the heap and the output for a new run.
+        """
+        self.heap_pointer = HEAP_BASE
+        self.free_blocks = {}
+        self.output = []
+
+    def functions(self) -> dict:
+        """
+        Returns the OS functions by their vm name.
+        """
+        return {
+            "Math.abs": abs,
+            "Math.multiply": lambda x, y: to_word(x * y),
+            "Math.divide": self.divide,
+            "Math.min": min,
+            "Math.max": max,
+            "Math.sqrt": self.sqrt,
+            "Memory.peek": self.peek,
+            "Memory.poke": self.poke,
+            "Memory.alloc": self.alloc,
+            "Memory.deAlloc": self.de_alloc,
+            "Array.new": self.alloc,
+            "Array.dispose": self.de_alloc,
+            "String.new": self.string_new,
+            "String.dispose": self.de_alloc,
+            "String.length": lambda string: self.ram[string + 1],
+            "String.charAt": lambda string, index: self.ram[string + 2 + index],
+            "String.setCharAt": self.string_set_char_at,
+            "String.appendChar": self.string_append_char,
+            "String.eraseLastChar": self.string_erase_last_char,
+            "String.intValue": self.string_int_value,
+            "String.setInt": self.string_set_int,
+            "String.newLine": lambda: NEW_LINE,
+            "String.backSpace": lambda: BACKSPACE,
+            "String.doubleQuote": lambda: DOUBLE_QUOTE,
+            "Output.printChar": self.print_char,
+            "Output.printString": self.print_string,
+            "Output.printInt": lambda value: self.output.append(str(value)),
+            "Output.println": lambda: self.output.append("\n"),
+            "Output.backSpace": lambda: self.output.append("\b"),
+            "Output.moveCursor": lambda row, column: 0,
+            "Sys.wait": lambda duration: 0,
+            "Sys.halt": self.halt,
+            "Sys.error": self.error,
+        }
+
+    ###############################
+    #  Math
+    ###############################
+    def divide(self, x: int, y: int) -> int:
+        """
+        Divides and rounds toward zero like the jack OS.
+        """
+        if y == 0:
+            self.error(3)
+        quotient = abs(x) // abs(y)
+        return quotient if (x < 0) == (y < 0) else -quotient
+
+    def sqrt(self, x: int) -> int:
+        """
+        Integer square root.
+        """
+        if x < 0:
+            self.error(4)
+        return int(x ** 0.5)
+
+    ###############################
+    #  Memory
+    ###############################
+    def peek(self, address: int) -> int:
+        """
+        Reads a memory word.
+        """
+        return self.ram[address]
+
+    def poke(self, address: int, value: int) -> int:
+        """
+        Writes a memory word.
+        """
+        self.ram[address] = value
+        return 0
+
+    def alloc(self, size: int) -> int:
+        """
+        Allocates a heap block. The word before the block holds its size.
+
+        Args:
+            size (int): Number of words
+
+        Returns:
+            address (int): Base address of the block
+        """
+        if size < 0:
+            self.error(5)
+        size = max(size, 1)
+        free = self.free_blocks.get(size)
+        if free:
+            return free.pop()
+        address = self.heap_pointer + 1
+        if address + size > HEAP_END:
+            self.error(6)
+        self.ram[self.heap_pointer] = size
+        self.heap_pointer = address + size
+        return address
+
+    def de_alloc(self, address: int) -> int:
+        """
+        Frees a heap block for reuse by blocks of the same size.
+        """
+        self.free_blocks.setdefault(self.ram[address - 1], []).append(address)
+        return 0
+
+    ###############################
+    #  String, laid out as max length, length, characters
+    ###############################
+    def string_new(self, max_length: int) -> int:
+        """
+        Allocates an empty string.
+        """
+        if max_length < 0:
+            self.error(14)
+        string = self.alloc(max_length + 2)
+        self.ram[string] = max_length
+        self.ram[string + 1] = 0
+        return string
+
+    def string_set_char_at(self, string: int, index: int, char: int) -> int:
+        """
+        Replaces a character.
+        """
+        self.ram[string + 2 + index] = char
+        return 0
+
+    def string_append_char(self, string: int, char: int) -> int:
+        """
+        Appends a character and returns the string.
+        """
+        length = self.ram[string + 1]
+        if length >= self.ram[string]:
+            self.error(17)
+        self.ram[string + 2 + length] = char
+        self.ram[string + 1] = length + 1
+        return string
+
+    def string_erase_last_char(self, string: int) -> int:
+        """
+        Removes the last character.
+        """
+        if self.ram[string + 1] == 0:
+            self.error(18)
+        self.ram[string + 1] -= 1
+        return 0
+
+    def string_value(self, string: int) -> str:
+        """
+        Reads a string from the heap.
+        """
+        start = string + 2
+        return "".join(map(jack_char, self.ram[start:start + self.ram[string + 1]]))
+
+    def string_int_value(self, string: int) -> int:
+        """
+        Parses the leading integer of a string.
+        """
+        text = self.string_value(string)
+        sign, digits = (-1, text[1:]) if text.startswith("-") else (1, text)
+        value = 0
+        for char in digits:
+            if not char.isdigit():
+                break
+            value = value * 10 + int(char)
+        return to_word(sign * value)
+
+    def string_set_int(self, string: int, value: int) -> int:
+        """
+        Replaces the contents of a string with the digits of an int.
+        """
+        digits = str(value)
+        if len(digits) > self.ram[string]:
+            self.error(19)
+        self.ram[string + 2:string + 2 + len(digits)] = [ord(char) for char in digits]
+        self.ram[string + 1] = len(digits)
+        return 0
+
+    ###############################
+    #  Output and Sys
+    ###############################
+    def print_char(self, char: int) -> int:
+        """
+        Prints a character.
+        """
+        self.output.append(jack_char(char))
+        return 0
+
+    def print_string(self, string: int) -> int:
+        """
+        Prints a string.
+        """
+        self.output.append(self.string_value(string))
+        return 0
+
+    def halt(self):
+        """
+        Stops the program.
+        """
+        raise Halt()
+
+    def error(self, code: int):
+        """
+        Stops the program with an OS error code.
+        """
+        raise RuntimeError(f"Sys.error({code})")
+
+
+def jack_char(code: int) -> str:
+    """
+    Converts a jack character code to text.
+    """
+    if code == NEW_LINE:
+        return "\n"
+    if code == BACKSPACE:
+        return "\b"
+    return chr(code)
+
+
+class VmInterpreter:
+    """
+    Runs the vm code of a set of classes in process.
+    The code is pre-decoded once into parallel int arrays of opcodes and
+    operands, with labels and function names resolved to instruction
+    indices, so the run loop only dispatches on small ints.
+    Functions the code calls but doesnt define are taken from JackOs.
+    """
+    def __init__(self, programs, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS):
+        """
+        Args:
+            programs (iterable): One VmProgram or list of vm lines, e.g. from
+                CodeGenerator.get_output, per class
+            max_instructions (int): Instructions a run may execute before it is stopped
+        """
+        self.max_instructions = max_instructions
+        self.ram = [0] * RAM_SIZE
+        self.os = JackOs(self.ram)
+        # Pre-decoded code: opcode, operand, and the argument count of calls
+        self.ops = array("b")
+        self.operands = array("i")
+        self.counts = array("i")
+        # Function name -> index of its first instruction
+        self.functions = {}
+        self.os_functions = []
+        self.steps = 0
+        self.load([
+            program if isinstance(program, VmProgram) else VmProgram.from_text(program)
+            for program in programs
+        ])
+
+    @property
+    def output(self) -> str:
+        """
+        Returns everything the program printed.
+        """
+        return "".join(self.os.output)
+
+    def load(self, programs: list):
+        """
+        Pre-decodes programs. Labels are scoped to their function, statics
+        to their class, and calls to unknown functions go to the OS.
+
+        Args:
+            programs (list): VmPrograms of the classes
+        """
+        # First pass: decode, and find where every label and function starts
+        decoded = []
+        labels = {}
+        statics = {}
+        function = None
+        for program in programs:
+            code = program.code
+            names = program.names
+            for position in range(0, len(code), WORDS_PER_INSTRUCTION):
+                head, operand = code[position], code[position + 1]
+                opcode, argument = head & OPCODE_MASK, head >> OPCODE_BITS
+                if opcode == FUNCTION:
+                    function = names[operand]
+                    self.functions[function] = len(decoded)
+                    decoded.append((ENTER, argument, 0, None))
+                elif opcode == LABEL:
+                    labels[function, names[operand]] = len(decoded)
+                elif opcode == PUSH or opcode == POP:
+                    segment = SEGMENTS[argument]
+                    if segment == "static":
+                        class_name = function.split(".", 1)[0]
+                        statics[class_name] = max(statics.get(class_name, 0), operand + 1)
+                        decoded.append((opcode, segment, operand, class_name))
+                    else:
+                        decoded.append((opcode, segment, operand, None))
+                elif opcode == GOTO or opcode == IF_GOTO:
+                    decoded.append((JUMP if opcode == GOTO else JUMP_IF, 0, 0, (function, names[operand])))
+                elif opcode == CALL:
+                    decoded.append((CALL_VM, argument, 0, names[operand]))
+                elif opcode == RETURN:
+                    decoded.append((LEAVE, 0, 0, None))
+                else:
+                    decoded.append((ARITHMETIC_OPS[opcode], 0, 0, None))
+
+        static_bases = {}
+        next_static = STATIC_BASE
+        for class_name, size in statics.items():
+            static_bases[class_name] = next_static
+            next_static += size
+        if next_static > STATIC_END:
+            raise MemoryError("Too many static variables.")
+
+        # Second pass: resolve segments, labels and calls to plain ints
+        os_functions = self.os.functions()
+        os_indices = {}
+        for opcode, argument, operand, name in decoded:
+            count = 0
+            if opcode == PUSH or opcode == POP:
+                segment = argument
+                if segment == "constant":
+                    if opcode == POP:
+                        raise ValueError("Cannot pop to the constant segment.")
+                    opcode = PUSH_CONSTANT
+                elif segment in PUSH_OPS:
+                    opcode = PUSH_OPS[segment] if opcode == PUSH else POP_OPS[segment]
+                else:
+                    if segment == "static":
+                        operand += static_bases[name]
+                    elif segment == "temp":
+                        operand += TEMP_BASE
+                    else:
+                        operand += THIS_ADDRESS
+                    opcode = PUSH_RAM if opcode == PUSH else POP_RAM
+            elif opcode == JUMP or opcode == JUMP_IF:
+                if name not in labels:
+                    raise NameError(f"Unknown label {name[1]} in {name[0]}.")
+                operand = labels[name]
+            elif opcode == CALL_VM:
+                count = argument
+                if name in self.functions:
+                    operand = self.functions[name]
+                elif name in os_functions:
+                    if name not in os_indices:
+                        os_indices[name] = len(self.os_functions)
+                        self.os_functions.append(os_functions[name])
+                    opcode, operand = CALL_OS, os_indices[name]
+                else:
+                    raise NameError(f"Unknown function {name}.")
+            elif opcode == ENTER:
+                count = argument
+            self.ops.append(opcode)
+            self.operands.append(operand)
+            self.counts.append(count)
+
+    def run(self, entry: str = None) -> int:
+        """
+        Runs the program from an entry function until it returns or halts.
+        Every run starts with zeroed memory, an empty heap and no output.
+
+        Args:
+            entry (str): Function to call, Sys.init if it is defined and Main.main otherwise
+
+        Returns:
+            value (int): The value returned by the entry function, 0 if it halted
+        """
+        if entry is None:
+            entry = "Sys.init" if "Sys.init" in self.functions else "Main.main"
+        if entry not in self.functions:
+            raise NameError(f"Unknown function {entry}.")
+        # Plain lists index faster than arrays in the loop
+        ops = self.ops.tolist()
+        operands = self.operands.tolist()
+        counts = self.counts.tolist()
+        os_functions = self.os_functions
+        ram = self.ram
+        # In place, the OS shares the list
+        ram[:] = [0] * RAM_SIZE
+        self.os.reset()
+
+        # Call the entry function with no arguments
+        sp = STACK_BASE
+        ram[sp:sp + 5] = [EXIT_ADDRESS, 0, 0, 0, 0]
+        sp += 5
+        arg = STACK_BASE
+        lcl = sp
+        pc = self.functions[entry]
+        steps = 0
+        try:
+            for steps in range(1, self.max_instructions + 1):
+                op = ops[pc]
+                x = operands[pc]
+                pc += 1
+                if op == PUSH_CONSTANT:
+                    ram[sp] = x
+                    sp += 1
+                elif op == PUSH_LOCAL:
+                    ram[sp] = ram[lcl + x]
+                    sp += 1
+                elif op == PUSH_ARGUMENT:
+                    ram[sp] = ram[arg + x]
+                    sp += 1
+                elif op == POP_LOCAL:
+                    sp -= 1
+                    ram[lcl + x] = ram[sp]
+                elif op == JUMP_IF:
+                    sp -= 1
+                    if ram[sp]:
+                        pc = x
+                elif op == JUMP:
+                    pc = x
+                elif op == ADD:
+                    sp -= 1
+                    ram[sp - 1] = ((ram[sp - 1] + ram[sp] + 32768) & 0xFFFF) - 32768
+                elif op == SUB:
+                    sp -= 1
+                    ram[sp - 1] = ((ram[sp - 1] - ram[sp] + 32768) & 0xFFFF) - 32768
+                elif op == LT:
+                    sp -= 1
+                    ram[sp - 1] = -1 if ram[sp - 1] < ram[sp] else 0
+                elif op == GT:
+                    sp -= 1
+                    ram[sp - 1] = -1 if ram[sp - 1] > ram[sp] else 0
+                elif op == EQ:
+                    sp -= 1
+                    ram[sp - 1] = -1 if ram[sp - 1] == ram[sp] else 0
+                elif op == NOT:
+                    ram[sp - 1] = ~ram[sp - 1]
+                elif op == PUSH_THIS:
+                    ram[sp] = ram[ram[THIS_ADDRESS] + x]
+                    sp += 1
+                elif op == PUSH_THAT:
+                    ram[sp] = ram[ram[THAT_ADDRESS] + x]
+                    sp += 1
+                elif op == PUSH_RAM:
+                    ram[sp] = ram[x]
+                    sp += 1
+                elif op == POP_THIS:
+                    sp -= 1
+                    ram[ram[THIS_ADDRESS] + x] = ram[sp]
+                elif op == POP_THAT:
+                    sp -= 1
+                    ram[ram[THAT_ADDRESS] + x] = ram[sp]
+                elif op == POP_RAM:
+                    sp -= 1
+                    ram[x] = ram[sp]
+                elif op == POP_ARGUMENT:
+                    sp -= 1
+                    ram[arg + x] = ram[sp]
+                elif op == CALL_OS:
+                    count = counts[pc - 1]
+                    sp -= count
+                    ram[sp] = to_word(os_functions[x](*ram[sp:sp + count]) or 0)
+                    sp += 1
+                elif op == CALL_VM:
+                    # The stack must not grow into the heap
+                    if sp + 5 > HEAP_BASE:
+                        raise RuntimeError("Stack overflow.")
+                    ram[sp:sp + 5] = [pc, lcl, arg, ram[THIS_ADDRESS], ram[THAT_ADDRESS]]
+                    arg = sp - counts[pc - 1]
+                    sp += 5
+                    lcl = sp
+                    pc = x
+                elif op == ENTER:
+                    count = counts[pc - 1]
+                    if sp + count > HEAP_BASE:
+                        raise RuntimeError("Stack overflow.")
+                    ram[sp:sp + count] = [0] * count
+                    sp += count
+                elif op == LEAVE:
+                    frame = lcl
+                    pc = ram[frame - 5]
+                    ram[arg] = ram[sp - 1]
+                    sp = arg + 1
+                    ram[THAT_ADDRESS] = ram[frame - 1]
+                    ram[THIS_ADDRESS] = ram[frame - 2]
+                    arg = ram[frame - 3]
+                    lcl = ram[frame - 4]
+                    if pc == EXIT_ADDRESS:
+                        break
+                elif op == NEG:
+                    ram[sp - 1] = to_word(-ram[sp - 1])
+                elif op == AND:
+                    sp -= 1
+                    ram[sp - 1] &= ram[sp]
+                else:
+                    sp -= 1
+                    ram[sp - 1] |= ram[sp]
+            else:
+                raise RuntimeError(f"Instruction budget of {self.max_instructions} exceeded.")
+        except Halt:
+            self.steps = steps
+            return 0
+        self.steps = steps
+        return ram[sp - 1]
+
+
+def run_sources(
+    sources: list, entry: str = None, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS, compiler=None
+):
+    """
+    Compiles jack classes and runs them, e.g. for end to end tests.
+
+    Args:
+        sources (list): JACK source code, one class per entry
+        entry (str): Function to call, see VmInterpreter.run
+        max_instructions (int): Instructions the run may execute before it is stopped
+        compiler (JackCompiler): Compiler to use, one without optimizations by default
+
+    Returns:
+        interpreter (VmInterpreter): The interpreter after the run, with its output and memory
+    """
+    # Imported here, the interpreter itself doesnt need the compiler
+    from .jack_compiler import JackCompiler  # pylint: disable=import-outside-toplevel
+
+    if compiler is None:
+        compiler = JackCompiler()
+    programs = []
+    for source in sources:
+        compiler.compile_source(source)
+        programs.append(compiler.code_generator.get_program())
+    interpreter = VmInterpreter(programs, max_instructions)
+    interpreter.run(entry)
+    return interpreter
@@ -0,0 +1 @@
+"""Tokenizer, parser and xml writer of the jack compiler"""
@@ -0,0 +1,5 @@
+"""Runs the analyzer with python -m syntax_analyzer"""
+import sys
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,167 @@
+"""This module contains the incremental build cache used by the analyzer"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from . import config
+
+DEFAULT_CACHE_DIR = ".jack_cache"
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BuildCache:
+    """
+    On disk cache of compiled outputs keyed by a hash of the source file
+    and the compiler version.
+    """
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> {"size": blob size, "used": last use time}
+        self.entries = {}
+        # output path -> [key, mtime_ns, size] of the output written from the cache
+        self.outputs = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """
+        Loads the cache index. An index from another compiler version is dropped.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return
+        if index.get("version") != config.COMPILER_VERSION:
+            return
+        self.entries = index.get("entries", {})
+        self.outputs = index.get("outputs", {})
+
+    def save(self):
+        """
+        Writes the cache index to disk.
+        """
+        index = {
+            "version": config.COMPILER_VERSION,
+            "entries": self.entries,
+            "outputs": self.outputs,
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_path, self.index_path)
+
+    def source_key(self, source: bytes, options: str = "") -> str:
+        """
+        Creates the cache key of a source file.
+
+        Args:
+            source (bytes): Content of the source file
+            options (str): Compiler options that change the output
+
+        Returns:
+            key (str): Hex digest of the source, options and compiler version
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(config.COMPILER_VERSION.encode())
+        digest.update(options.encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def blob_path(self, key: str) -> str:
+        """
+        Returns the path of a cached output.
+        """
+        return os.path.join(self.cache_dir, f"{key}.out")
+
+    def restore(self, key: str, output_path: str) -> bool:
+        """
+        Restores the output of a cached source.
+        An output that is still the one written from the cache is left in place.
+
+        Args:
+            key (str): Cache key of the source
+            output_path (str): Where the output belongs
+
+        Returns:
+            hit (bool): True if the output is up to date
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False
+        entry["used"] = time.time()
+        self.hits += 1
+
+        if self.outputs.get(output_path) == [key, *self.output_stat(output_path)]:
+            return True
+        try:
+            shutil.copyfile(self.blob_path(key), output_path)
+        except FileNotFoundError:
+            del self.entries[key]
+            self.hits -= 1
+            self.misses += 1
+            return False
+        self.remember_output(key, output_path)
+        return True
+
+    def store(self, key: str, output_path: str):
+        """
+        Copies a freshly compiled output into the cache.
+
+        Args:
+            key (str): Cache key of the source
+            output_path (str): Path of the compiled output
+        """
+        shutil.copyfile(output_path, self.blob_path(key))
+        self.entries[key] = {"size": os.path.getsize(output_path), "used": time.time()}
+        self.remember_output(key, output_path)
+        self.evict()
+
+    def remember_output(self, key: str, output_path: str):
+        """
+        Records which cache entry an output file was written from.
+        """
+        self.outputs[output_path] = [key, *self.output_stat(output_path)]
+
+    def output_stat(self, output_path: str) -> tuple:
+        """
+        Returns the modification time and size of an output file.
+        """
+        try:
+            stat = os.stat(output_path)
+        except FileNotFoundError:
+            return None, None
+        return stat.st_mtime_ns, stat.st_size
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits its limits.
+        """
+        total_bytes = sum(entry["size"] for entry in self.entries.values())
+        if len(self.entries) <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        for key in sorted(self.entries, key=lambda key: self.entries[key]["used"]):
+            if len(self.entries) <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            total_bytes -= self.entries.pop(key)["size"]
+            try:
+                os.remove(self.blob_path(key))
+            except FileNotFoundError:
+                pass
+        live_keys = set(self.entries)
+        self.outputs = {
+            path: record for path, record in self.outputs.items() if record[0] in live_keys
+        }
@@ -0,0 +1,184 @@
+"""This module contains the command line interface of the analyzer"""
+import argparse
+import sys
+
+from .watcher import Watcher, DEFAULT_INTERVAL, DEFAULT_DEBOUNCE
+from .diagnostics import DIAGNOSTIC_FORMATS
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        args (argparse.Namespace): Parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="jack-analyzer", description="Parse jack files into xml files.")
+    parser.add_argument("input_path", help="Jack file or root directory of the jack files, searched recursively")
+    parser.add_argument(
+        "-o", "--output-dir",
+        default=None,
+        help="Directory the xml files are written to, xml_files by default",
+    )
+    parser.add_argument(
+        "--legacy-tokenizer",
+        action="store_true",
+        help="Use the old character by character tokenizer",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        help="Only compile the jack files matching this glob, can be repeated",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=None,
+        help="Skip the files and directories matching this glob, can be repeated. Hidden directories are always skipped",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=None,
+        help="Threads reading and writing files while a single process compiles, 0 disables them, 4 by default",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read, tokenize and write files lazily so memory stays bounded on large files",
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="count",
+        default=0,
+        help="Print debug output such as the token list",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompile every file instead of reusing the build cache",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory of the build cache, .jack_cache by default",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=None,
+        help="Size limit of the build cache in megabytes, 64 by default",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, 0 uses every core",
+    )
+    parser.add_argument(
+        "--diagnostics",
+        choices=DIAGNOSTIC_FORMATS,
+        default="text",
+        help="Report every syntax error as file:line:column: message, or as one JSON object per line",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["text", "json"],
+        default=None,
+        help="Report call counts and times of the compile methods, forces a single process",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="Write the profile to this file instead of stderr",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and recompile the files that change",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Seconds between two polls of the input directory",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="Seconds a burst of saves has to settle before a rebuild",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the analyzer from the command line.
+    The compiler modules are imported after the arguments are parsed, so
+    --help and argument errors return without loading them.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        status (int): Exit status, 1 if a file failed to compile
+    """
+    args = parse_args(argv)
+    # pylint: disable=import-outside-toplevel
+    from .jack_analyzer import JackAnalyzer, DEFAULT_OUTPUT_DIR, DEFAULT_IO_THREADS
+    from .discovery import DEFAULT_EXCLUDE
+
+    output_dir = args.output_dir or DEFAULT_OUTPUT_DIR
+    build_cache = None
+    if not args.no_cache:
+        from .build_cache import BuildCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+        max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else DEFAULT_MAX_BYTES
+        build_cache = BuildCache(args.cache_dir or DEFAULT_CACHE_DIR, max_bytes=max_bytes)
+    jack_profiler = None
+    if args.profile:
+        from .profiler import Profiler
+        jack_profiler = Profiler()
+    jack_analyzer_cls = JackAnalyzer(
+        legacy_tokenizer=args.legacy_tokenizer,
+        verbosity=args.verbose,
+        cache=build_cache,
+        profiler=jack_profiler,
+        streaming=args.stream,
+        include=args.include,
+        exclude=DEFAULT_EXCLUDE + tuple(args.exclude or ()),
+        io_threads=DEFAULT_IO_THREADS if args.io_threads is None else args.io_threads,
+        diagnostics_format=args.diagnostics,
+    )
+    if args.watch:
+        watcher = Watcher(
+            jack_analyzer_cls,
+            args.input_path,
+            dir_path=output_dir,
+            interval=args.watch_interval,
+            debounce=args.debounce,
+        )
+        # Changes saved during the first build are picked up by the first poll
+        watcher.start()
+    failed = jack_analyzer_cls.manipulate_files(args.input_path, jobs=args.jobs, dir_path=output_dir)
+    if args.watch:
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+    if jack_profiler:
+        profile = jack_profiler.format_json() if args.profile == "json" else jack_profiler.format_text()
+        if args.profile_output:
+            with open(args.profile_output, "w") as profile_file:
+                profile_file.write(profile + "\n")
+        else:
+            print(profile, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
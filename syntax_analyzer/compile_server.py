@@ -0,0 +1,269 @@
+"""This module serves compile requests to a long running analyzer over JSON lines"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+
+OUTPUT_MODES = ["xml", "tokens"]
+
+
+def compile_request(analyzer, request: dict) -> dict:
+    """
+    Compiles the source or the file of a request.
+
+    Args:
+        analyzer (JackAnalyzer): Warm analyzer
+        request (dict): {"id": any, "source": str} or {"id": any, "path": str},
+            optionally with "output" set to one of OUTPUT_MODES
+
+    Returns:
+        response (dict): {"id", "ok", "output"} on success, otherwise {"id", "ok", "error", "diagnostics"}
+            with one {"file", "line", "column", "message"} object per error
+    """
+    # pylint: disable=import-outside-toplevel
+    from .source_reader import load_source, strip_comments
+    from .diagnostics import collect_diagnostics
+
+    response = {"id": request.get("id")}
+    try:
+        mode = request.get("output", "xml")
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {mode}")
+        if "source" in request:
+            source = strip_comments(request["source"])
+        elif "path" in request:
+            source = load_source(request["path"])
+        else:
+            raise ValueError("Request needs a source or a path")
+
+        if mode == "tokens":
+            output = [[token.name, token.value] for token in analyzer.source_tokens(source)]
+        else:
+            output = analyzer.compile_source(source)
+    except Exception as error:  # pylint: disable=broad-except
+        diagnostics = collect_diagnostics(request.get("path"), error)
+        response.update(
+            ok=False,
+            error=f"{type(error).__name__}: {error}",
+            diagnostics=[diagnostic._asdict() for diagnostic in diagnostics],
+        )
+        return response
+    response.update(ok=True, output=output)
+    return response
+
+
+class CompileServer:
+    """
+    Answers compile requests with warm analyzers, one per worker process.
+    Requests and responses are JSON objects, one per line. With several
+    workers responses come back in completion order, the id ties them to
+    their request.
+    """
+    def __init__(self, jobs: int = 1, legacy_tokenizer: bool = False):
+        """
+        Args:
+            jobs (int): Number of worker processes, 1 compiles in the server process, 0 uses every core
+            legacy_tokenizer (bool): Use the old line by line tokenizer
+        """
+        self.jobs = jobs if jobs else os.cpu_count()
+        self.legacy_tokenizer = legacy_tokenizer
+        self.analyzer = None
+        self.executor = None
+        # Imported here, so --help and argument errors return without loading the analyzer
+        # pylint: disable=import-outside-toplevel
+        from .jack_analyzer import JackAnalyzer, init_worker, call_in_worker
+        self.call_in_worker = call_in_worker
+        if self.jobs == 1:
+            self.analyzer = JackAnalyzer(legacy_tokenizer=legacy_tokenizer)
+            # Socket connections are served by threads that share the analyzer
+            self.analyzer_lock = threading.Lock()
+        else:
+            # Imported here, starting up the process pool machinery is slow
+            from concurrent.futures import ProcessPoolExecutor
+            # The workers are set up like the ones of JackAnalyzer.compile_files_parallel
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=init_worker,
+                initargs=(legacy_tokenizer, 0),
+            )
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self.executor:
+            self.executor.shutdown()
+
+    def serve_lines(self, input_file, output_file):
+        """
+        Answers every request read from a stream until it ends.
+
+        Args:
+            input_file (opened_file): Stream of JSON requests, one per line
+            output_file (opened_file): Stream the JSON responses are written to
+        """
+        write_lock = threading.Lock()
+
+        def respond(response: dict):
+            with write_lock:
+                output_file.write(json.dumps(response) + "\n")
+                output_file.flush()
+
+        # Requests handed to the workers and not answered yet. Once there are
+        # max_pending of them the reader waits, so memory stays bounded.
+        pending = set()
+        pending_changed = threading.Condition()
+        max_pending = 2 * self.jobs
+
+        def respond_when_done(future, request_id):
+            # A worker that died still gets its request answered
+            try:
+                response = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                response = {"id": request_id, "ok": False, "error": f"{type(error).__name__}: {error}"}
+            respond(response)
+            # Only forgotten once answered, a future is done before its callbacks run
+            with pending_changed:
+                pending.discard(future)
+                pending_changed.notify_all()
+
+        for line in input_file:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+            except ValueError as error:
+                respond({"id": None, "ok": False, "error": f"{type(error).__name__}: {error}"})
+                continue
+
+            if self.executor is None:
+                with self.analyzer_lock:
+                    respond(compile_request(self.analyzer, request))
+            else:
+                with pending_changed:
+                    pending_changed.wait_for(lambda: len(pending) < max_pending)
+                request_id = request.get("id")
+                try:
+                    future = self.executor.submit(self.call_in_worker, compile_request, request)
+                except Exception as error:  # pylint: disable=broad-except
+                    # The pool is broken or shut down
+                    respond({"id": request_id, "ok": False, "error": f"{type(error).__name__}: {error}"})
+                    continue
+                with pending_changed:
+                    pending.add(future)
+                future.add_done_callback(lambda done, request_id=request_id: respond_when_done(done, request_id))
+        # Answer the pending requests before the stream is closed
+        with pending_changed:
+            pending_changed.wait_for(lambda: not pending)
+
+    def serve_socket(self, socket_path: str):
+        """
+        Listens on a unix domain socket, every connection is a JSON lines stream.
+
+        Args:
+            socket_path (str): Path of the socket file
+        """
+        compile_server = self
+
+        class ConnectionHandler(socketserver.StreamRequestHandler):
+            """
+            Serves the requests of one connection.
+            """
+            def handle(self):
+                """
+                Reads requests until the client closes its side of the connection.
+                """
+                compile_server.serve_lines(
+                    (line.decode() for line in self.rfile),
+                    LineWriter(self.wfile),
+                )
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, ConnectionHandler) as server:
+            try:
+                server.serve_forever()
+            finally:
+                os.remove(socket_path)
+
+
+class LineWriter:
+    """
+    Text interface over the binary stream of a socket connection.
+    """
+    def __init__(self, binary_file):
+        self.binary_file = binary_file
+
+    def write(self, text: str):
+        """
+        Writes text as utf-8.
+        """
+        self.binary_file.write(text.encode())
+
+    def flush(self):
+        """
+        Sends the written data.
+        """
+        self.binary_file.flush()
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        args (argparse.Namespace): Parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="jack-server", description="Serve jack compile requests as JSON lines.")
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Listen on this unix domain socket instead of stdin",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes, 0 uses every core",
+    )
+    parser.add_argument(
+        "--legacy-tokenizer",
+        action="store_true",
+        help="Use the old character by character tokenizer",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the compile server until its input ends or it is interrupted.
+
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv
+
+    Returns:
+        status (int): Exit status
+    """
+    args = parse_args(argv)
+    jack_server = CompileServer(jobs=args.jobs, legacy_tokenizer=args.legacy_tokenizer)
+    try:
+        if args.socket:
+            jack_server.serve_socket(args.socket)
+        else:
+            jack_server.serve_lines(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        jack_server.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,9 @@
 """File containing types for configuration"""
+import re
+
+# Bump whenever the output format changes, invalidates the build cache
+COMPILER_VERSION = "0.4.0"
+
 ###############################
 #  Definition for tokenizer
 ###############################
@@ -172,3 +177,48 @@ jack_grammar = {
     "integerConstant": ["int"],  
     "stringConstant": ["string"]
 }
+
+###############################
+#  Lookup tables built from the grammar at import
+###############################
+
+_TERMINAL_PATTERN = re.compile(r"'([^']+)'")
+
+
+def terminals(*entries) -> frozenset:
+    """
+    Collects the quoted terminals of grammar entries, e.g. "('static' | 'field')".
+    """
+    return frozenset(
+        terminal for entry in entries for terminal in _TERMINAL_PATTERN.findall(entry)
+    )
+
+
+KEYWORDS = frozenset(keywords)
+SYMBOLS = frozenset(symbols)
+
+OPS = terminals(*jack_grammar["op"])
+UNARY_OPS = terminals(*jack_grammar["unaryOp"])
+KEYWORD_CONSTANTS = terminals(*jack_grammar["keywordConstant"])
+TYPE_KEYWORDS = terminals(*jack_grammar["type"])
+
+# FIRST sets, the tokens a rule can start with
+CLASS_VAR_DEC_FIRST = terminals(jack_grammar["classVarDec"][0])
+SUBROUTINE_DEC_FIRST = terminals(jack_grammar["subroutineDec"][0])
+# Statement rule of every statement keyword, e.g. "let" -> "letStatement"
+STATEMENT_FIRST = {
+    next(iter(terminals(jack_grammar[rule][0]))): rule for rule in jack_grammar["statement"]
+}
+
+# Parser method of every statement rule
+STATEMENT_PARSERS = {
+    "letStatement": "compile_let",
+    "ifStatement": "compile_if",
+    "whileStatement": "compile_while",
+    "doStatement": "compile_do",
+    "returnStatement": "compile_return",
+}
+# Statement keyword -> parser method, the parser binds it to its own methods
+STATEMENT_DISPATCH = {
+    keyword: STATEMENT_PARSERS[rule] for keyword, rule in STATEMENT_FIRST.items()
+}
@@ -0,0 +1,73 @@
+"""This module turns compile errors into diagnostics that editors and CI tools can read"""
+import json
+from collections import namedtuple
+
+DIAGNOSTIC_FORMATS = ["text", "json"]
+
+# Line and column start at 1, 0 means the position is unknown
+Diagnostic = namedtuple("Diagnostic", ["file", "line", "column", "message"])
+
+
+class SyntaxErrors(SyntaxError):
+    """
+    Every syntax error found in a file, raised once the whole file is parsed.
+    It is a SyntaxError itself, so callers that stop at the first error still work.
+    """
+    def __init__(self, errors: list):
+        """
+        Args:
+            errors (list): The SyntaxErrors in source order
+        """
+        super().__init__("\n".join(format_position(error) for error in errors))
+        self.errors = errors
+
+
+def format_position(error: SyntaxError) -> str:
+    """
+    Formats a syntax error as line:column: message, without the position if it is unknown.
+    """
+    if not error.lineno:
+        return error.msg
+    return f"{error.lineno}:{error.offset or 0}: {error.msg}"
+
+
+def collect_diagnostics(file: str, error: Exception) -> list:
+    """
+    Lists the diagnostics of an error raised while compiling a file.
+
+    Args:
+        file (str): Path of the jack file
+        error (Exception): Error raised by the compile
+
+    Returns:
+        diagnostics (list): One Diagnostic per syntax error, or one for any other error
+    """
+    if isinstance(error, SyntaxErrors):
+        errors = error.errors
+    elif isinstance(error, SyntaxError):
+        errors = [error]
+    else:
+        return [Diagnostic(file, 0, 0, f"{type(error).__name__}: {error}")]
+    return [Diagnostic(file, error.lineno or 0, error.offset or 0, error.msg) for error in errors]
+
+
+def format_diagnostics(diagnostics: list, output_format: str = "text") -> str:
+    """
+    Formats diagnostics one per line.
+
+    Args:
+        diagnostics (list): Diagnostics to format
+        output_format (str): "text" for file:line:column: message, "json" for one JSON object per line
+
+    Returns:
+        report (str): The formatted diagnostics
+    """
+    if output_format == "json":
+        return "\n".join(json.dumps(diagnostic._asdict()) for diagnostic in diagnostics)
+    lines = []
+    for diagnostic in diagnostics:
+        if diagnostic.line:
+            lines.append(f"{diagnostic.file}:{diagnostic.line}:{diagnostic.column}: {diagnostic.message}")
+        else:
+            lines.append(f"{diagnostic.file}: {diagnostic.message}")
+    return "\n".join(lines)
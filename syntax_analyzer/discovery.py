@@ -0,0 +1,54 @@
+"""This module finds the jack files of a project"""
+import os
+from fnmatch import fnmatch
+
+# Hidden directories such as .git or the build cache are never searched
+DEFAULT_EXCLUDE = (".*",)
+
+
+def matches(rel_path: str, patterns) -> bool:
+    """
+    Checks a path against glob patterns. Patterns without a slash match the
+    last path component, the others the whole path relative to the project root.
+
+    Args:
+        rel_path (str): Path relative to the project root, with / separators
+        patterns (iterable): Glob patterns
+
+    Returns:
+        matched (bool): True if any pattern matches
+    """
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch(rel_path if "/" in pattern else name, pattern) for pattern in patterns)
+
+
+def discover_files(input_path: str, include=None, exclude=DEFAULT_EXCLUDE) -> list:
+    """
+    Finds the jack files below a directory. Excluded directories are not
+    walked into at all.
+
+    Args:
+        input_path (str): Jack file or root directory of the project
+        include (iterable): Glob patterns a file has to match, every .jack file by default
+        exclude (iterable): Glob patterns of the files and directories to skip
+
+    Returns:
+        file_paths (list): Sorted paths of the jack files
+    """
+    if not os.path.isdir(input_path):
+        return [input_path]
+    exclude = tuple(exclude or ())
+    file_paths = []
+    for dir_path, dir_names, file_names in os.walk(input_path):
+        rel_dir = os.path.relpath(dir_path, input_path).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        # Prune in place so os.walk skips the excluded directories
+        dir_names[:] = [name for name in dir_names if not matches(prefix + name, exclude)]
+        for file_name in file_names:
+            rel_path = prefix + file_name
+            if not file_name.endswith(".jack") or matches(rel_path, exclude):
+                continue
+            if include and not matches(rel_path, include):
+                continue
+            file_paths.append(os.path.join(dir_path, file_name))
+    return sorted(file_paths)
@@ -1,41 +1,338 @@
 """This module is used to parse input jack files into output xml files"""
-import sys
+import io
 import os
-from jack_tokenizer import JackTokenizer
-from jack_comp_engine import JackCompEngine
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from .jack_tokenizer import JackTokenizer
+from .jack_comp_engine import JackCompEngine
+from .source_reader import load_source, read_lines
+from .build_cache import BuildCache
+from .profiler import Profiler
+from .discovery import discover_files, DEFAULT_EXCLUDE
+from .diagnostics import collect_diagnostics, format_diagnostics
+
+DEFAULT_OUTPUT_DIR = "xml_files"
+DEFAULT_IO_THREADS = 4
 
 class JackAnalyzer:
     """
     Class used to analyze jack files and turn them into xml tree structured files.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        legacy_tokenizer: bool = False,
+        verbosity: int = 0,
+        cache: BuildCache = None,
+        profiler: Profiler = None,
+        streaming: bool = False,
+        include: list = None,
+        exclude: list = DEFAULT_EXCLUDE,
+        io_threads: int = DEFAULT_IO_THREADS,
+        diagnostics_format: str = "text",
+    ):
+        """
+        Args:
+            legacy_tokenizer (bool): Use the old line by line tokenizer
+            verbosity (int): Debug output level
+            cache (BuildCache): Build cache, None compiles every file
+            profiler (Profiler): Profiler of the compile methods, None disables profiling
+            streaming (bool): Read, tokenize and write files lazily
+            include (list): Glob patterns the jack files have to match
+            exclude (list): Glob patterns of the files and directories to skip
+            io_threads (int): Threads reading and writing files next to the compile, 0 disables them
+            diagnostics_format (str): "text" or "json", format of the reported errors
+        """
         self.tokenizer_cls = JackTokenizer()
-        self.comp_engine_cls = JackCompEngine()
+        self.comp_engine_cls = JackCompEngine(verbosity=verbosity)
+        self.legacy_tokenizer = legacy_tokenizer
+        self.cache = cache
+        self.profiler = profiler
+        # Read, tokenize and write files lazily instead of materializing every token
+        self.streaming = streaming
+        self.include = include
+        self.exclude = exclude
+        self.io_threads = io_threads
+        self.diagnostics_format = diagnostics_format
         self.file_struc = []
+        if profiler:
+            profiler.instrument(self.comp_engine_cls)
 
     ## This is just a mock function on how the flow will run
-    def manipulate_files(self):
+    def manipulate_files(
+        self,
+        input_path: str,
+        jobs: int = 1,
+        dir_path: str = DEFAULT_OUTPUT_DIR,
+        file_paths: list = None,
+    ) -> list:
         """
-        Opens a directory containing files.
+        Compiles a jack file or every jack file below a directory.
+        The directory tree of the sources is mirrored in the output directory.
+        Errors are reported per file, so one broken file doesnt stop the batch.
+
+        Args:
+            input_path (str): Jack file or root directory of the jack files
+            jobs (int): Number of worker processes, 0 uses every core
+            dir_path (str): Output directory of the xml files
+            file_paths (list): Files below input_path to compile, defaults to every jack file found there
+
+        Returns:
+            failures (list): (file path, diagnostics) pairs of the files that failed
         """
-        # Define dir
-        dir_path = "xml_files"
-        self.create_xml_dir(dir_path)
-        # Input dir specified in sys arg
-        input_dir = sys.argv[1]
         # Creates paths for the files
-        file_paths = [f"{input_dir}/{file_name}" for file_name in os.listdir(input_dir)]
-        # Loops over files
+        if file_paths is None:
+            file_paths = self.list_files(input_path)
+        output_dirs = {file: self.get_output_dir(file, input_path, dir_path) for file in file_paths}
+        for output_dir in set(output_dirs.values()) | {dir_path}:
+            self.create_xml_dir(output_dir)
+        # Skip the files whose outputs are already cached
+        cache_keys = self.restore_cached(file_paths, output_dirs) if self.cache else {}
+        pending = [file for file in file_paths if file not in cache_keys or cache_keys[file] is not None]
+
+        # Profiles are collected in this process only
+        if jobs == 1 or self.profiler:
+            if self.io_threads and not (self.streaming or self.profiler):
+                results = self.compile_files_threaded(pending, output_dirs)
+            else:
+                results = [self.safe_compile_file(file, output_dirs[file]) for file in pending]
+        else:
+            results = self.compile_files_parallel(pending, output_dirs, jobs or os.cpu_count())
+
+        if self.cache:
+            for file, error in results:
+                if error is None and cache_keys.get(file):
+                    self.cache.store(cache_keys[file], self.get_xml_path(file, output_dirs[file]))
+            self.cache.save()
+
+        failures = [(file, error) for file, error in results if error is not None]
+        for _, diagnostics in failures:
+            print(diagnostics, file=sys.stderr)
+        return failures
+
+    def list_files(self, input_path: str) -> list:
+        """
+        Lists the files to compile, searching directories recursively.
+
+        Args:
+            input_path (str): Jack file or root directory of the jack files
+
+        Returns:
+            file_paths (list): Sorted paths of the jack files
+        """
+        return discover_files(input_path, include=self.include, exclude=self.exclude)
+
+    def get_output_dir(self, file: str, input_path: str, dir_path: str) -> str:
+        """
+        Gets the directory the xml file of a jack file is written to.
+
+        Args:
+            file (str): Path of the jack file
+            input_path (str): Jack file or root directory the file was found in
+            dir_path (str): Output directory
+
+        Returns:
+            output_dir (str): dir_path, or the subdirectory matching the file's place below input_path
+        """
+        root = input_path if os.path.isdir(input_path) else os.path.dirname(input_path)
+        rel_dir = os.path.relpath(os.path.dirname(file), root or ".")
+        return dir_path if rel_dir == os.curdir else os.path.join(dir_path, rel_dir)
+
+    def restore_cached(self, file_paths: list, output_dirs: dict) -> dict:
+        """
+        Restores the outputs of the files found in the build cache.
+
+        Args:
+            file_paths (list): Paths of the jack files
+            output_dirs (dict): Output directory of every file
+
+        Returns:
+            cache_keys (dict): Cache key of every file that has to be compiled, None for cache hits
+        """
+        options = f"legacy_tokenizer={self.legacy_tokenizer}"
+        cache_keys = {}
         for file in file_paths:
-            with open(file) as jack_file:
-                # Tokenizes files
-                self.tokenizer(jack_file)
-                file_name = self.get_file_name(file)
-                # Set xml path
-                file_path = f"{dir_path}/{file_name}.xml"
-                # Open XML file for writing
-                with open(file_path, "w") as xml_file:
-                    self.comp_engine_cls.populate_xml(xml_file, self.file_struc)
+            try:
+                with open(file, "rb") as jack_file:
+                    key = self.cache.source_key(jack_file.read(), options)
+            except OSError:
+                # Leave the error to be reported by the compile step
+                continue
+            hit = self.cache.restore(key, self.get_xml_path(file, output_dirs[file]))
+            cache_keys[file] = None if hit else key
+        return cache_keys
+
+    def compile_files_threaded(self, file_paths: list, output_dirs: dict) -> list:
+        """
+        Compiles files in this process while a thread pool reads the next
+        sources ahead and writes the finished xml files, so slow storage
+        overlaps with the compile instead of adding to it.
+
+        Args:
+            file_paths (list): Paths of the jack files
+            output_dirs (dict): Output directory of every file
+
+        Returns:
+            results (list): (file path, diagnostics) pairs in input order
+        """
+        errors = {}
+        writes = []
+        with ThreadPoolExecutor(max_workers=self.io_threads) as executor:
+            remaining = iter(file_paths)
+            # Bounded read ahead, only a few sources are held in memory
+            reads = deque(
+                (file, executor.submit(load_source, file))
+                for file in islice(remaining, 2 * self.io_threads)
+            )
+            while reads:
+                file, read = reads.popleft()
+                for next_file in islice(remaining, 1):
+                    reads.append((next_file, executor.submit(load_source, next_file)))
+                try:
+                    xml = self.compile_source(read.result())
+                except Exception as error:  # pylint: disable=broad-except
+                    errors[file] = self.format_error(file, error)
+                    continue
+                xml_path = self.get_xml_path(file, output_dirs[file])
+                writes.append((file, executor.submit(write_output, xml_path, xml)))
+
+            for file, write in writes:
+                error = write.exception()
+                if error is not None:
+                    errors[file] = self.format_error(file, error)
+        return [(file, errors.get(file)) for file in file_paths]
+
+    def compile_files_parallel(self, file_paths: list, output_dirs: dict, jobs: int) -> list:
+        """
+        Compiles files in a process pool. Every worker has its own tokenizer and engine.
+
+        Args:
+            file_paths (list): Paths of the jack files
+            output_dirs (dict): Output directory of every file
+            jobs (int): Number of worker processes
+
+        Returns:
+            results (list): (file path, diagnostics) pairs in input order
+        """
+        # Imported here, starting up the process pool machinery is slow
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+
+        chunksize = max(1, len(file_paths) // (jobs * 4))
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=init_worker,
+            initargs=(
+                self.legacy_tokenizer, self.comp_engine_cls.verbosity, self.streaming, self.diagnostics_format
+            ),
+        ) as executor:
+            return list(executor.map(
+                compile_in_worker, file_paths, [output_dirs[file] for file in file_paths], chunksize=chunksize
+            ))
+
+    def safe_compile_file(self, file: str, dir_path: str) -> tuple:
+        """
+        Compiles a file and catches any error it raises.
+
+        Args:
+            file (str): Path of the jack file
+            dir_path (str): Output directory
+
+        Returns:
+            result (tuple): File path and formatted diagnostics, None on success
+        """
+        try:
+            self.compile_file(file, dir_path)
+        except Exception as error:  # pylint: disable=broad-except
+            return file, self.format_error(file, error)
+        return file, None
+
+    def format_error(self, file: str, error: Exception) -> str:
+        """
+        Formats the error of a failed compile, one line per syntax error.
+
+        Args:
+            file (str): Path of the jack file
+            error (Exception): Error raised by the compile
+
+        Returns:
+            diagnostics (str): The diagnostics in the configured format
+        """
+        return format_diagnostics(collect_diagnostics(file, error), self.diagnostics_format)
+
+    def compile_file(self, file: str, dir_path: str) -> str:
+        """
+        Compiles a single jack file into an xml file.
+        The xml file is only replaced once the whole file parsed, so a file
+        with syntax errors leaves the previous output alone.
+
+        Args:
+            file (str): Path of the jack file
+            dir_path (str): Output directory
+
+        Returns:
+            file_path (str): Path of the written xml file
+        """
+        file_path = self.get_xml_path(file, dir_path)
+        if self.streaming:
+            # The xml is written while parsing, into a temporary file that replaces the output on success
+            tmp_path = f"{file_path}.tmp"
+            tokens = self.stream_tokens(file)
+            try:
+                with open(tmp_path, "w") as xml_file:
+                    self.comp_engine_cls.stream_xml(xml_file, tokens)
+                os.replace(tmp_path, file_path)
+            finally:
+                # Closing the tokens records the profile of a partly read file
+                if hasattr(tokens, "close"):
+                    tokens.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return file_path
+        try:
+            # Tokenizes files
+            self.tokenizer(file)
+            tree = self.comp_engine_cls.parse(self.file_struc)
+        finally:
+            self.file_struc = []
+        # Open XML file for writing
+        with open(file_path, "w") as xml_file:
+            self.comp_engine_cls.write_xml(xml_file, tree)
+        return file_path
+
+    def compile_source(self, source: str) -> str:
+        """
+        Compiles jack source code into xml in memory.
+
+        Args:
+            source (str): Source code of one class with comments blanked out
+
+        Returns:
+            xml (str): The xml tree of the class
+        """
+        xml_file = io.StringIO()
+        try:
+            self.tokenize_source(source)
+            self.comp_engine_cls.populate_xml(xml_file, self.file_struc)
+        finally:
+            self.file_struc = []
+        return xml_file.getvalue()
+
+    def source_tokens(self, source: str) -> list:
+        """
+        Tokenizes jack source code in memory with the configured tokenizer.
+
+        Args:
+            source (str): Source code of one class with comments blanked out
+
+        Returns:
+            tokens (list): Tokens of the class
+        """
+        try:
+            self.tokenize_source(source)
+            return list(chain.from_iterable(self.file_struc))
+        finally:
             self.file_struc = []
 
     def create_xml_dir(self, dir_path):
@@ -46,6 +343,19 @@ class JackAnalyzer:
         if not os.path.isdir(dir_path):
             os.makedirs(dir_path)
 
+    def get_xml_path(self, file: str, dir_path: str) -> str:
+        """
+        Gets the path of the xml file compiled from a jack file.
+
+        Args:
+            file (str): Path of the jack file
+            dir_path (str): Output directory
+
+        Returns:
+            xml_path (str): Path of the xml file
+        """
+        return os.path.join(dir_path, f"{self.get_file_name(file)}.xml")
+
     def get_file_name(self, file) -> str:
         """
         Gets the name of the file
@@ -57,33 +367,146 @@ class JackAnalyzer:
             file_name (str): Name of a file
         """
         # Get the file name
-        _, file_name_type = file.split("/")
+        file_name_type = os.path.basename(file)
         file_name, _ = os.path.splitext(file_name_type)
         return file_name
 
     def tokenizer(self, file: str) -> dict:
         """
         Tokenizes file while adding symbol types.
+        The comment free source is tokenized as one buffer unless the
+        legacy line by line tokenizer is switched on.
+
+        Args:
+            file (str): Path of the jack file
+
+        Returns:
+            file_struc (list): Lists of tokens
+        """
+        source = load_source(file)
+        if self.profiler:
+            self.profile_tokenizer(file, source)
+            return
+        self.tokenize_source(source)
+
+    def stream_tokens(self, file: str):
+        """
+        Reads and tokenizes a file lazily, one line at a time.
+
+        Args:
+            file (str): Path of the jack file
+
+        Returns:
+            tokens (iterator): Tokens of the file
+        """
+        lines = read_lines(file)
+        if self.profiler:
+            return self.profile_stream(file, lines)
+        return self.tokenize_lines(lines)
+
+    def tokenize_lines(self, lines):
+        """
+        Tokenizes comment free lines lazily with the configured tokenizer.
 
         Args:
-            file (str): Opened file
+            lines (iterable): Source lines with comments blanked out
 
         Returns:
-            file_struc (list): Dict containing the tokens with symbols
+            tokens (iterator): Tokens of the lines
+        """
+        if not self.legacy_tokenizer:
+            return self.tokenizer_cls.tokenize_lines(lines)
+        return chain.from_iterable(
+            self.tokenizer_cls.tokenize_line(line.strip()) for line in lines if line.strip()
+        )
+
+    def tokenize_source(self, source: str):
         """
+        Tokenizes comment free source code into the file structure.
+
+        Args:
+            source (str): Source code with comments blanked out
+        """
+        if not self.legacy_tokenizer:
+            # Tokenize the whole file in a single pass
+            self.file_struc.append(self.tokenizer_cls.tokenize(source))
+            return
+
         # Loop over lines in a file
-        for line in file:
+        for line in source.splitlines():
             # Get rid of trailing whitespaces
             line_striped = line.strip()
 
             # Check if line doesnt contain code
-            if line_striped.startswith(("//", "/*", "*/", "*")) or len(line_striped) == 0:
+            if len(line_striped) == 0:
                 continue
             # Gets the token types for the specified line
             token_types = self.tokenizer_cls.tokenize_line(line_striped)
-            # Adds the token types to the dict
+            # Adds the token types to the file structure
             self.file_struc.append(token_types)
 
+    def profile_tokenizer(self, file: str, source: str):
+        """
+        Tokenizes a source like tokenizer does and records the timings in the profiler.
+
+        Args:
+            file (str): Path of the jack file
+            source (str): Comment free source of the file
+        """
+        lines = source.count("\n") + 1
+        max_line_seconds = None
+        start = time.perf_counter()
+        if not self.legacy_tokenizer:
+            self.file_struc.append(self.tokenizer_cls.tokenize(source))
+        else:
+            max_line_seconds = 0.0
+            for line in source.splitlines():
+                line_striped = line.strip()
+                if len(line_striped) == 0:
+                    continue
+                line_start = time.perf_counter()
+                self.file_struc.append(self.tokenizer_cls.tokenize_line(line_striped))
+                max_line_seconds = max(max_line_seconds, time.perf_counter() - line_start)
+        elapsed = time.perf_counter() - start
+        tokens = sum(len(token_types) for token_types in self.file_struc)
+        self.profiler.record_file(file, tokens, lines, elapsed, max_line_seconds)
+
+    def profile_stream(self, file: str, lines):
+        """
+        Tokenizes lines lazily like stream_tokens does and records the timings
+        in the profiler once the tokens are exhausted or closed. The time
+        includes reading the lines, which happens as tokens are pulled.
+
+        Args:
+            file (str): Path of the jack file
+            lines (iterable): Source lines with comments blanked out
+
+        Yields:
+            token (Token): The next token
+        """
+        line_count = 0
+
+        def count_lines():
+            nonlocal line_count
+            for line in lines:
+                line_count += 1
+                yield line
+
+        token_count = 0
+        elapsed = 0.0
+        tokens = self.tokenize_lines(count_lines())
+        try:
+            while True:
+                start = time.perf_counter()
+                token = next(tokens, None)
+                elapsed += time.perf_counter() - start
+                if token is None:
+                    break
+                token_count += 1
+                yield token
+        finally:
+            self.profiler.record_file(file, token_count, line_count, elapsed)
+
     def create_xml_file(self, output_path: str):
         """
         Creates an XML file and writes content to it.
@@ -96,6 +519,40 @@ class JackAnalyzer:
             return xml_file
 
 
-if __name__ == '__main__':
-    jack_analyzer_cls = JackAnalyzer()
-    jack_analyzer_cls.manipulate_files()
+def write_output(path: str, text: str):
+    """
+    Writes a compiled output file.
+    """
+    with open(path, "w") as output_file:
+        output_file.write(text)
+
+
+# Analyzer owned by a pool worker process
+_worker_analyzer = None
+
+
+def init_worker(legacy_tokenizer: bool, verbosity: int, streaming: bool = False, diagnostics_format: str = "text"):
+    """
+    Creates the analyzer of a pool worker process.
+    """
+    global _worker_analyzer  # pylint: disable=global-statement
+    _worker_analyzer = JackAnalyzer(
+        legacy_tokenizer=legacy_tokenizer,
+        verbosity=verbosity,
+        streaming=streaming,
+        diagnostics_format=diagnostics_format,
+    )
+
+
+def compile_in_worker(file: str, dir_path: str) -> tuple:
+    """
+    Compiles a file with the analyzer of the current worker process.
+    """
+    return _worker_analyzer.safe_compile_file(file, dir_path)
+
+
+def call_in_worker(function, *args):
+    """
+    Calls a function with the analyzer of the current worker process as its first argument.
+    """
+    return function(_worker_analyzer, *args)
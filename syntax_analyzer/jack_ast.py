@@ -0,0 +1,417 @@
+"""This module contains the nodes of the jack syntax tree"""
+from .jack_token import Token
+
+
+class Node:
+    """
+    Base class of the syntax tree nodes.
+    Children are the tokens and nodes of the rule in source order.
+    """
+    __slots__ = ("children",)
+    # Name of the xml element, None for rules that dont get their own element
+    tag = None
+
+    def __init__(self, children):
+        self.children = tuple(children)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self.children)} children)"
+
+
+###############################
+#  Class structure
+###############################
+class ClassNode(Node):
+    """
+    'class' className '{' classVarDec* subroutineDec* '}'
+    """
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the class name.
+        """
+        return self.children[1].value
+
+    @property
+    def class_var_decs(self) -> tuple:
+        """
+        Returns the class variable declarations.
+        """
+        return tuple(child for child in self.children if isinstance(child, ClassVarDec))
+
+    @property
+    def subroutine_decs(self) -> tuple:
+        """
+        Returns the subroutine declarations.
+        """
+        return tuple(child for child in self.children if isinstance(child, SubroutineDec))
+
+
+class ClassVarDec(Node):
+    """
+    ('static' | 'field') type varName (',' varName)* ';'
+    """
+    __slots__ = ()
+    tag = "classVarDec"
+
+    @property
+    def kind(self) -> str:
+        """
+        Returns 'static' or 'field'.
+        """
+        return self.children[0].value
+
+    @property
+    def type_name(self) -> str:
+        """
+        Returns the declared type.
+        """
+        return self.children[1].value
+
+    @property
+    def names(self) -> list:
+        """
+        Returns the declared variable names.
+        """
+        return [token.value for token in self.children[2:-1:2]]
+
+
+class SubroutineDec(Node):
+    """
+    ('constructor' | 'function' | 'method') ('void' | type) subroutineName
+    '(' parameterList ')' '{' subroutineBody
+    """
+    __slots__ = ()
+    tag = "subroutineDec"
+
+    @property
+    def kind(self) -> str:
+        """
+        Returns 'constructor', 'function' or 'method'.
+        """
+        return self.children[0].value
+
+    @property
+    def return_type(self) -> str:
+        """
+        Returns the return type.
+        """
+        return self.children[1].value
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the subroutine name.
+        """
+        return self.children[2].value
+
+    @property
+    def parameter_list(self):
+        """
+        Returns the parameter list node.
+        """
+        return self.children[4]
+
+    @property
+    def body(self):
+        """
+        Returns the subroutine body node.
+        """
+        return self.children[-1]
+
+
+class ParameterList(Node):
+    """
+    ((type varName) (',' type varName)*)?
+    """
+    __slots__ = ()
+
+    @property
+    def parameters(self) -> list:
+        """
+        Returns (type, name) pairs of the parameters.
+        """
+        types = self.children[0::3]
+        names = self.children[1::3]
+        return [(type_.value, name.value) for type_, name in zip(types, names)]
+
+
+class SubroutineBody(Node):
+    """
+    varDec* statements '}'
+    """
+    __slots__ = ()
+    tag = "subroutineBody"
+
+    @property
+    def var_decs(self) -> tuple:
+        """
+        Returns the local variable declarations.
+        """
+        return tuple(child for child in self.children if isinstance(child, VarDec))
+
+    @property
+    def statements(self):
+        """
+        Returns the statements node.
+        """
+        return self.children[-2]
+
+
+class VarDec(Node):
+    """
+    'var' type varName (',' varName)* ';'
+    """
+    __slots__ = ()
+    tag = "varDec"
+
+    @property
+    def type_name(self) -> str:
+        """
+        Returns the declared type.
+        """
+        return self.children[1].value
+
+    @property
+    def names(self) -> list:
+        """
+        Returns the declared variable names.
+        """
+        return [token.value for token in self.children[2:-1:2]]
+
+
+###############################
+#  Statements
+###############################
+class Statements(Node):
+    """
+    statement*
+    """
+    __slots__ = ()
+    tag = "statements"
+
+
+class LetStatement(Node):
+    """
+    'let' varName ('[' expression ']')? '=' expression ';'
+    """
+    __slots__ = ()
+    tag = "letStatement"
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the assigned variable name.
+        """
+        return self.children[1].value
+
+    @property
+    def index(self):
+        """
+        Returns the array index expression, or None.
+        """
+        if self.children[2].value == "[":
+            return self.children[3]
+        return None
+
+    @property
+    def value(self):
+        """
+        Returns the assigned expression.
+        """
+        return self.children[-2]
+
+
+class IfStatement(Node):
+    """
+    'if' '(' expression ')' '{' statements '}' ('else' '{' statements '}')?
+    """
+    __slots__ = ()
+    tag = "ifStatement"
+
+    @property
+    def condition(self):
+        """
+        Returns the condition expression.
+        """
+        return self.children[2]
+
+    @property
+    def statements(self):
+        """
+        Returns the statements of the if branch.
+        """
+        return self.children[5]
+
+    @property
+    def else_statements(self):
+        """
+        Returns the statements of the else branch, or None.
+        """
+        if len(self.children) > 7:
+            return self.children[9]
+        return None
+
+
+class WhileStatement(Node):
+    """
+    'while' '(' expression ')' '{' statements '}'
+    """
+    __slots__ = ()
+    tag = "whileStatement"
+
+    @property
+    def condition(self):
+        """
+        Returns the condition expression.
+        """
+        return self.children[2]
+
+    @property
+    def statements(self):
+        """
+        Returns the loop body.
+        """
+        return self.children[5]
+
+
+class DoStatement(Node):
+    """
+    'do' subroutineCall ';'
+    """
+    __slots__ = ()
+    tag = "doStatement"
+
+    @property
+    def call(self):
+        """
+        Returns the subroutine call node.
+        """
+        return self.children[1]
+
+
+class ReturnStatement(Node):
+    """
+    'return' expression? ';'
+    """
+    __slots__ = ()
+    tag = "returnStatement"
+
+    @property
+    def value(self):
+        """
+        Returns the returned expression, or None.
+        """
+        if len(self.children) == 3:
+            return self.children[1]
+        return None
+
+
+###############################
+#  Expressions
+###############################
+class Expression(Node):
+    """
+    term (op term)*
+    """
+    __slots__ = ()
+    tag = "expression"
+
+    @property
+    def first_term(self):
+        """
+        Returns the first term.
+        """
+        return self.children[0]
+
+    @property
+    def operations(self) -> list:
+        """
+        Returns (op, term) pairs following the first term.
+        """
+        return [(op.value, term) for op, term in zip(self.children[1::2], self.children[2::2])]
+
+
+class Term(Node):
+    """
+    integerConstant | stringConstant | keywordConstant | varName |
+    varName '[' expression ']' | subroutineCall | '(' expression ')' | unaryOp term
+    """
+    __slots__ = ()
+    tag = "term"
+
+
+class SubroutineCall(Node):
+    """
+    (className | varName '.')? subroutineName '(' expressionList ')'
+    """
+    __slots__ = ()
+
+    @property
+    def receiver(self):
+        """
+        Returns the class or variable name before the '.', or None.
+        """
+        if self.children[1].value == ".":
+            return self.children[0].value
+        return None
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the subroutine name.
+        """
+        if self.children[1].value == ".":
+            return self.children[2].value
+        return self.children[0].value
+
+    @property
+    def arguments(self) -> tuple:
+        """
+        Returns the argument expressions.
+        """
+        return self.children[-2].expressions
+
+
+class ExpressionList(Node):
+    """
+    (expression (',' expression)*)?
+    """
+    __slots__ = ()
+    tag = "expressionList"
+
+    @property
+    def expressions(self) -> tuple:
+        """
+        Returns the expressions of the list.
+        """
+        return self.children[0::2]
+
+
+class NodeVisitor:
+    """
+    Walks a syntax tree. Calls visit_<ClassName> for a node if it exists,
+    otherwise generic_visit. Tokens go to visit_token.
+    """
+    def visit(self, node):
+        """
+        Visits a node or a token.
+        """
+        if isinstance(node, Token):
+            return self.visit_token(node)
+        method = getattr(self, f"visit_{type(node).__name__}", self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        """
+        Visits every child of a node.
+        """
+        for child in node.children:
+            self.visit(child)
+
+    def visit_token(self, token):
+        """
+        Visits a token, does nothing by default.
+        """
@@ -1,338 +1,539 @@
 """This module is used to compile the given code"""
-import config
+from itertools import chain
+from . import config
+from .jack_token import TokenStream, LazyTokenStream, KEYWORD, INT_CONST, STRING_CONST, IDENTIFIER
+from .jack_ast import (
+    ClassNode, ClassVarDec, SubroutineDec, ParameterList, SubroutineBody, VarDec,
+    Statements, LetStatement, IfStatement, WhileStatement, DoStatement, ReturnStatement,
+    Expression, Term, SubroutineCall, ExpressionList
+)
+from .xml_emitter import XmlEmitter, XmlWriter
+from .diagnostics import SyntaxErrors
+
+# Grammar terminals without the quotes used in config.jack_grammar
+OPS = config.OPS
+UNARY_OPS = config.UNARY_OPS
+KEYWORD_CONSTANTS = config.KEYWORD_CONSTANTS
+TYPE_KEYWORDS = config.TYPE_KEYWORDS
+# Tokens after an identifier that start a subroutine call
+CALL_SYMBOLS = frozenset(["(", "."])
+# Tokens a broken statement or declaration is skipped to, see synchronize
+STATEMENT_SYNC = frozenset(config.STATEMENT_DISPATCH)
+VAR_DEC_SYNC = STATEMENT_SYNC | {"var"}
+DECLARATION_SYNC = config.CLASS_VAR_DEC_FIRST | config.SUBROUTINE_DEC_FIRST
 
 class JackCompEngine:
     """
     This class is used to compile given code.
     """
-    def __init__(self):
-        self.xml_file = None
-        self.cls_config = None
-        self.curr_token = None
-        self.token_types = None
+    def __init__(self, verbosity: int = 0):
+        self.emitter = None
+        self.tokens = None
+        self.verbosity = verbosity
+        # Statement keyword -> bound parser method, filled by parse
+        self.statement_parsers = {}
+        # Syntax errors recovered from in the class being parsed
+        self.errors = []
 
-    def populate_xml(self, xml_file, token_types):
+    def populate_xml(self, xml_file, token_types, emitter=None):
         """
         Entry point for the compilation process.
+        Parses the tokens and writes the syntax tree as xml.
+
+        Args:
+            xml_file (opened_file): File the xml is written to
+            token_types (list): Lists of tokens
+            emitter (XmlEmitter): Output emitter, defaults to a buffered xml writer over xml_file
         """
-        flattened_list = [token for sublist in token_types for token in sublist]
-        print(flattened_list)  # Debug print
-        self.token_types = flattened_list
-        self.curr_token = self.token_types.pop(0) if self.token_types else None
-        self.xml_file = xml_file
-        self.compile_class()
+        self.write_xml(xml_file, self.parse(token_types), emitter)
 
-    def compile_class(self):
+    def write_xml(self, xml_file, tree, emitter=None):
         """
-        Compiles a class structure.
+        Writes a parsed syntax tree as xml.
+
+        Args:
+            xml_file (opened_file): File the xml is written to
+            tree (ClassNode): Root of the syntax tree
+            emitter (XmlEmitter): Output emitter, defaults to a buffered xml writer over xml_file
         """
-        key, value = self.get_current_token()
+        self.emitter = emitter if emitter is not None else XmlEmitter(xml_file)
+        XmlWriter(self.emitter).visit(tree)
+        self.emitter.flush()
 
-        # Ensure the first token is "class"
-        if value != "class":
-            raise SyntaxError("Expected 'class' keyword at the beginning of the class definition.")
-        self.write_token(key, value)
-        self.advance_token()
+    def parse(self, token_types) -> ClassNode:
+        """
+        Parses the tokens of a class into a syntax tree.
 
-        # Process the class name (identifier)
-        key, value = self.get_current_token()
-        if key != "IDENTIFIER":
-            raise SyntaxError("Expected class name (identifier).")
-        self.write_token(key, value)
-        self.advance_token()
+        Args:
+            token_types (list): Lists of tokens
+
+        Returns:
+            tree (ClassNode): Root of the syntax tree
+        """
+        flattened_list = list(chain.from_iterable(token_types))
+        if self.verbosity > 0:
+            print(flattened_list)  # Debug print
+        self.start(TokenStream(flattened_list))
+        return self.compile_checked()
+
+    def stream_xml(self, xml_file, tokens, emitter=None):
+        """
+        Parses tokens pulled lazily from an iterator and writes every part of
+        the class as soon as it is parsed. Only the class member being parsed
+        is held in memory.
+
+        Args:
+            xml_file (opened_file): File the xml is written to
+            tokens (iterable): Tokens of a class, e.g. from JackTokenizer.tokenize_lines
+            emitter (XmlEmitter): Output emitter, defaults to a buffered xml writer over xml_file
+        """
+        self.start(LazyTokenStream(tokens))
+        self.emitter = emitter if emitter is not None else XmlEmitter(xml_file)
+        self.compile_checked(XmlWriter(self.emitter).visit)
+        self.emitter.flush()
+
+    def start(self, tokens):
+        """
+        Prepares the engine for parsing a new class.
+
+        Args:
+            tokens (TokenStream): Stream the tokens are read from
+        """
+        self.tokens = tokens
+        # Bound here so methods replaced on the instance, e.g. by the profiler, are used
+        self.statement_parsers = {
+            keyword: getattr(self, method) for keyword, method in config.STATEMENT_DISPATCH.items()
+        }
+        self.errors = []
+
+    def compile_checked(self, on_child=None) -> ClassNode:
+        """
+        Compiles a class and raises every syntax error found in it at once.
+        Broken statements and declarations are skipped, so parsing goes on
+        after an error and a single pass reports all of them.
+
+        Args:
+            on_child (callable): Passed on to compile_class
+
+        Returns:
+            tree (ClassNode): Root of the syntax tree
+        """
+        tree = None
+        try:
+            tree = self.compile_class(on_child)
+        except SyntaxError as error:
+            # Errors outside of any statement or declaration end the class
+            self.errors.append(error)
+        if self.errors:
+            raise SyntaxErrors(self.errors)
+        return tree
+
+    def compile_class(self, on_child=None) -> ClassNode:
+        """
+        Compiles a class structure.
 
+        Args:
+            on_child (callable): Called with every child as soon as it is parsed,
+                the children are then left out of the returned node
+        """
+        children = []
+        keep = children.append if on_child is None else on_child
+        # Ensure the first token is "class"
+        keep(self.expect("class", "Expected 'class' keyword at the beginning of the class definition."))
+        # Process the class name (identifier)
+        keep(self.expect_kind(IDENTIFIER, "Expected class name (identifier)."))
         # Process the opening '{'
-        key, value = self.get_current_token()
-        if value != "{":
-            raise SyntaxError("Expected '{' after class name.")
-        self.write_token(key, value)
-        self.advance_token()
+        keep(self.expect("{", "Expected '{' after class name."))
 
         # Handle classVarDec* (zero or more class variable declarations)
-        while self.get_current_token()[1] in ["static", "field"]:
-            self.compile_classVarDec()
+        while self.current_value() in config.CLASS_VAR_DEC_FIRST:
+            try:
+                keep(self.compile_classVarDec())
+            except SyntaxError as error:
+                self.recover(error, DECLARATION_SYNC)
 
         # Handle subroutineDec* (zero or more subroutine declarations)
-        while self.get_current_token()[1] in ["constructor", "function", "method"]:
-            self.compile_subroutineDec()
+        while True:
+            while self.current_value() in config.SUBROUTINE_DEC_FIRST:
+                try:
+                    keep(self.compile_subroutineDec())
+                except SyntaxError as error:
+                    self.recover(error, DECLARATION_SYNC)
+            token = self.tokens.peek()
+            if token is None or token.value == "}":
+                break
+            # Stray tokens between the subroutines, including misplaced class variables
+            self.recover(
+                self.error(f"Expected subroutine or '}}', got '{token.value}'.", token), config.SUBROUTINE_DEC_FIRST
+            )
 
         # Process the closing '}'
-        key, value = self.get_current_token()
-        if value != "}":
-            raise SyntaxError("Expected '}' at the end of the class definition.")
-        self.write_token(key, value)
-        self.advance_token()
+        keep(self.expect("}", "Expected '}' at the end of the class definition."))
+        return ClassNode(children)
 
-    def compile_classVarDec(self):
+    def compile_classVarDec(self) -> ClassVarDec:
         """
         Compiles a class variable declaration.
         """
-        self.xml_file.write("<classVarDec>\n")
-        key, value = self.get_current_token()
-        while value != ";":  # Process until the semicolon
-            self.write_token(key, value)
-            self.advance_token()
-            key, value = self.get_current_token()
-        # Write the semicolon
-        self.write_token(key, value)
-        self.advance_token()
-        self.xml_file.write("</classVarDec>\n")
+        children = [self.take()]
+        children.extend(self.compile_varNames())
+        return ClassVarDec(children)
 
-    def compile_subroutineDec(self):
+    def compile_subroutineDec(self) -> SubroutineDec:
         """
         Compiles a subroutine declaration.
         """
-        self.xml_file.write("<subroutineDec>\n")
-        key, value = self.get_current_token()
-        while value != "{":  # Process until the opening '{'
-            self.write_token(key, value)
-            self.advance_token()
-            key, value = self.get_current_token()
+        children = [self.take()]
+        # Return type
+        if self.current_value() == "void":
+            children.append(self.take())
+        else:
+            children.append(self.compile_type())
+        children.append(self.expect_kind(IDENTIFIER, "Expected subroutine name (identifier)."))
+        children.append(self.expect("(", "Expected '(' before parameter list."))
+        children.append(self.compile_parameterList())
+        children.append(self.expect(")", "Expected ')' after parameter list."))
 
         # Process the subroutine body
-        self.write_token(key, value)  # Write the opening '{'
-        self.advance_token()
-        self.compile_subroutineBody()
-        self.xml_file.write("</subroutineDec>\n")
+        children.append(self.expect("{", "Expected '{' before subroutine body."))
+        children.append(self.compile_subroutineBody())
+        return SubroutineDec(children)
 
-    def compile_subroutineBody(self):
+    def compile_parameterList(self) -> ParameterList:
         """
-        Compiles a subroutine body.
+        Compiles a (possibly empty) parameter list.
         """
-        self.xml_file.write("<subroutineBody>\n")
-        key, value = self.get_current_token()
+        children = []
+        if self.current_value() != ")":
+            children.append(self.compile_type())
+            children.append(self.expect_kind(IDENTIFIER, "Expected parameter name (identifier)."))
+            while self.current_value() == ",":
+                children.append(self.take())
+                children.append(self.compile_type())
+                children.append(self.expect_kind(IDENTIFIER, "Expected parameter name (identifier)."))
+        return ParameterList(children)
 
+    def compile_subroutineBody(self) -> SubroutineBody:
+        """
+        Compiles a subroutine body.
+        """
+        children = []
         # Handle varDec* (zero or more variable declarations)
-        while value == "var":
-            self.compile_varDec()
-            key, value = self.get_current_token()
+        while self.current_value() == "var":
+            try:
+                children.append(self.compile_varDec())
+            except SyntaxError as error:
+                self.recover(error, VAR_DEC_SYNC)
 
         # Handle statements
-        self.compile_statements()
+        children.append(self.compile_statements())
 
         # Process the closing '}'
-        key, value = self.get_current_token()
-        if value != "}":
-            raise SyntaxError("Expected '}' at the end of the subroutine body.")
-        self.write_token(key, value)
-        self.advance_token()
-        self.xml_file.write("</subroutineBody>\n")
+        children.append(self.expect("}", "Expected '}' at the end of the subroutine body."))
+        return SubroutineBody(children)
 
-    def compile_varDec(self):
+    def compile_varDec(self) -> VarDec:
         """
         Compiles a variable declaration.
         """
-        self.xml_file.write("<varDec>\n")
-        key, value = self.get_current_token()
-        while value != ";":  # Process until the semicolon
-            self.write_token(key, value)
-            self.advance_token()
-            key, value = self.get_current_token()
-        # Write the semicolon
-        self.write_token(key, value)
+        children = [self.take()]
+        children.extend(self.compile_varNames())
+        return VarDec(children)
+
+    def compile_varNames(self) -> list:
+        """
+        Compiles the type varName (',' varName)* ';' part of a declaration.
+        """
+        children = [self.compile_type()]
+        children.append(self.expect_kind(IDENTIFIER, "Expected variable name (identifier)."))
+        while self.current_value() == ",":
+            children.append(self.take())
+            children.append(self.expect_kind(IDENTIFIER, "Expected variable name (identifier)."))
+        children.append(self.expect(";", "Expected ';' at the end of the declaration."))
+        return children
+
+    def compile_type(self):
+        """
+        Compiles a type, either a builtin type keyword or a class name.
+        """
+        token = self.tokens.peek()
+        if token is None or not (token.value in TYPE_KEYWORDS or token.kind == IDENTIFIER):
+            raise self.error(f"Expected type, got {token.value if token else 'end of file'}.", token)
         self.advance_token()
-        self.xml_file.write("</varDec>\n")
+        return token
 
-    def compile_statements(self):
+    def compile_statements(self) -> Statements:
         """
         Compiles a sequence of statements.
         """
-        self.xml_file.write("<statements>\n")
-        while self.get_current_token()[1] in ["let", "if", "while", "do", "return"]:
-            key, value = self.get_current_token()
-            if value == "let":
-                self.compile_let()
-            elif value == "if":
-                self.compile_if()
-            elif value == "while":
-                self.compile_while()
-            elif value == "do":
-                self.compile_do()
-            elif value == "return":
-                self.compile_return()
-        self.xml_file.write("</statements>\n")
-
-    def compile_let(self):
+        children = []
+        parsers = self.statement_parsers
+        while True:
+            token = self.tokens.peek()
+            if token is None:
+                break
+            parser = parsers.get(token.value)
+            if parser is None:
+                # Every statement sequence is closed by a '}'
+                if token.value == "}":
+                    break
+                self.recover(self.error(f"Expected statement, got '{token.value}'.", token), STATEMENT_SYNC)
+                continue
+            try:
+                children.append(parser())
+            except SyntaxError as error:
+                self.recover(error, STATEMENT_SYNC)
+        return Statements(children)
+
+    def compile_let(self) -> LetStatement:
         """
         Compiles a let statement.
         """
-        self.xml_file.write("<letStatement>\n")
-        self.process_until(";")
-        self.xml_file.write("</letStatement>\n")
+        children = [self.take()]
+        children.append(self.expect_kind(IDENTIFIER, "Expected variable name after 'let'."))
+        if self.current_value() == "[":
+            children.append(self.take())
+            children.append(self.compile_expression())
+            children.append(self.expect("]", "Expected ']' after array index."))
+        children.append(self.expect("=", "Expected '=' in let statement."))
+        children.append(self.compile_expression())
+        children.append(self.expect(";", "Expected ';' at the end of the let statement."))
+        return LetStatement(children)
 
-    def compile_if(self):
+    def compile_if(self) -> IfStatement:
         """
         Compiles an if statement.
         """
-        self.xml_file.write("<ifStatement>\n")
-        self.process_until("}")
-        self.xml_file.write("</ifStatement>\n")
+        children = [self.take()]
+        children.extend(self.compile_condition_block("if"))
+        if self.current_value() == "else":
+            children.append(self.take())
+            children.append(self.expect("{", "Expected '{' after 'else'."))
+            children.append(self.compile_statements())
+            children.append(self.expect("}", "Expected '}' at the end of the else block."))
+        return IfStatement(children)
 
-    def compile_while(self):
+    def compile_while(self) -> WhileStatement:
         """
         Compiles a while statement.
         """
-        self.xml_file.write("<whileStatement>\n")
-        self.process_until("}")
-        self.xml_file.write("</whileStatement>\n")
+        children = [self.take()]
+        children.extend(self.compile_condition_block("while"))
+        return WhileStatement(children)
 
-    def compile_do(self):
+    def compile_condition_block(self, keyword: str) -> list:
         """
-        Compiles a do statement.
+        Compiles the '(' expression ')' '{' statements '}' part of if and while statements.
         """
-        self.xml_file.write("<doStatement>\n")
-        self.process_until(";")
-        self.xml_file.write("</doStatement>\n")
+        children = [self.expect("(", f"Expected '(' after '{keyword}'.")]
+        children.append(self.compile_expression())
+        children.append(self.expect(")", f"Expected ')' after the {keyword} condition."))
+        children.append(self.expect("{", f"Expected '{{' after the {keyword} condition."))
+        children.append(self.compile_statements())
+        children.append(self.expect("}", f"Expected '}}' at the end of the {keyword} block."))
+        return children
 
-    def compile_return(self):
+    def compile_do(self) -> DoStatement:
         """
-        Compiles a return statement.
+        Compiles a do statement.
         """
-        self.xml_file.write("<returnStatement>\n")
-        self.process_until(";")
-        self.xml_file.write("</returnStatement>\n")
+        children = [self.take()]
+        children.append(self.compile_subroutineCall())
+        children.append(self.expect(";", "Expected ';' at the end of the do statement."))
+        return DoStatement(children)
 
-    def process_until(self, stop_token):
+    def compile_return(self) -> ReturnStatement:
         """
-        Processes tokens until a specific stop token is encountered.
+        Compiles a return statement.
         """
-        key, value = self.get_current_token()
-        while value != stop_token:
-            self.write_token(key, value)
-            self.advance_token()
-            key, value = self.get_current_token()
-        # Write the stop token
-        self.write_token(key, value)
-        self.advance_token()
+        children = [self.take()]
+        if self.current_value() != ";":
+            children.append(self.compile_expression())
+        children.append(self.expect(";", "Expected ';' at the end of the return statement."))
+        return ReturnStatement(children)
 
-    def compile_expression(self):
+    def compile_expression(self) -> Expression:
         """
         Compiles an expression.
         """
-        self.xml_file.write("<expression>\n")
-        self.compile_term()
-        while self.get_current_token()[1] in config.jack_grammar["op"]:
-            key, value = self.get_current_token()
-            self.write_token(key, value)
-            self.advance_token()
-            self.compile_term()
-        self.xml_file.write("</expression>\n")
+        children = [self.compile_term()]
+        while self.current_value() in OPS:
+            children.append(self.take())
+            children.append(self.compile_term())
+        return Expression(children)
 
-    def compile_term(self):
+    def compile_term(self) -> Term:
         """
         Compiles a term.
         """
-        self.xml_file.write("<term>\n")
-        key, value = self.get_current_token()
+        token = self.tokens.peek()
+        if token is None:
+            raise self.error("Unexpected end of file in expression.", token)
+        kind, value = token.kind, token.value
 
-        if value in config.jack_grammar["unaryOp"]:
-            # Unary operation
-            self.write_token(key, value)
-            self.advance_token()
-            self.compile_term()
-        elif value == "(":
-            # Parenthesized expression
-            self.write_token(key, value)
-            self.advance_token()
-            self.compile_expression()
-            key, value = self.get_current_token()
-            if value != ")":
-                raise SyntaxError("Expected ')' after expression.")
-            self.write_token(key, value)
-            self.advance_token()
-        elif key == "INT_CONST" or key == "STRING_CONST" or value in config.jack_grammar["keywordConstant"]:
-            # Integer constant, string constant, or keyword constant
-            self.write_token(key, value)
-            self.advance_token()
-        elif key == "IDENTIFIER":
+        if kind == IDENTIFIER:
             # Variable, array, or subroutine call
-            self.write_token(key, value)
-            self.advance_token()
-            if self.get_current_token()[1] == "[":
-                # Array access
-                key, value = self.get_current_token()
-                self.write_token(key, value)
-                self.advance_token()
-                self.compile_expression()
-                key, value = self.get_current_token()
-                if value != "]":
-                    raise SyntaxError("Expected ']' after array index.")
-                self.write_token(key, value)
-                self.advance_token()
-            elif self.get_current_token()[1] in ["(", "."]:
+            next_token = self.tokens.peek(1)
+            next_value = next_token.value if next_token else None
+            if next_value in CALL_SYMBOLS:
                 # Subroutine call
-                self.compile_subroutineCall()
-        else:
-            raise SyntaxError(f"Unexpected term: {value}")
-        self.xml_file.write("</term>\n")
+                return Term([self.compile_subroutineCall()])
+            children = [self.take()]
+            if next_value == "[":
+                # Array access
+                children.append(self.take())
+                children.append(self.compile_expression())
+                children.append(self.expect("]", "Expected ']' after array index."))
+            return Term(children)
+        if kind in (INT_CONST, STRING_CONST) or (kind == KEYWORD and value in KEYWORD_CONSTANTS):
+            # Integer constant, string constant, or keyword constant
+            return Term([self.take()])
+        if value in UNARY_OPS:
+            # Unary operation
+            return Term([self.take(), self.compile_term()])
+        if value == "(":
+            # Parenthesized expression
+            children = [self.take(), self.compile_expression()]
+            children.append(self.expect(")", "Expected ')' after expression."))
+            return Term(children)
+        raise self.error(f"Unexpected term: {value}", token)
 
-    def compile_expressionList(self):
+    def compile_expressionList(self) -> ExpressionList:
         """
         Compiles a (possibly empty) comma-separated list of expressions.
         """
-        self.xml_file.write("<expressionList>\n")
-        if self.get_current_token()[1] != ")":
-            self.compile_expression()
-            while self.get_current_token()[1] == ",":
-                key, value = self.get_current_token()
-                self.write_token(key, value)
-                self.advance_token()
-                self.compile_expression()
-        self.xml_file.write("</expressionList>\n")
+        children = []
+        if self.current_value() != ")":
+            children.append(self.compile_expression())
+            while self.current_value() == ",":
+                children.append(self.take())
+                children.append(self.compile_expression())
+        return ExpressionList(children)
 
-    def compile_subroutineCall(self):
+    def compile_subroutineCall(self) -> SubroutineCall:
         """
         Compiles a subroutine call.
         """
-        key, value = self.get_current_token()
-        self.write_token(key, value)
-        self.advance_token()
+        children = [self.expect_kind(IDENTIFIER, "Expected subroutine name (identifier).")]
 
-        if self.get_current_token()[1] == ".":
+        if self.current_value() == ".":
             # Handle className or varName followed by '.'
-            key, value = self.get_current_token()
-            self.write_token(key, value)
-            self.advance_token()
-            key, value = self.get_current_token()
-            if key != "IDENTIFIER":
-                raise SyntaxError("Expected subroutine name after '.'.")
-            self.write_token(key, value)
-            self.advance_token()
+            children.append(self.take())
+            children.append(self.expect_kind(IDENTIFIER, "Expected subroutine name after '.'."))
 
         # Handle '(' expressionList ')'
-        key, value = self.get_current_token()
-        if value != "(":
-            raise SyntaxError("Expected '(' before expression list.")
-        self.write_token(key, value)
-        self.advance_token()
-        self.compile_expressionList()
-        key, value = self.get_current_token()
-        if value != ")":
-            raise SyntaxError("Expected ')' after expression list.")
-        self.write_token(key, value)
+        children.append(self.expect("(", "Expected '(' before expression list."))
+        children.append(self.compile_expressionList())
+        children.append(self.expect(")", "Expected ')' after expression list."))
+        return SubroutineCall(children)
+
+    def current_value(self):
+        """
+        Returns the value of the current token, or None at the end of the tokens.
+        """
+        token = self.tokens.peek()
+        return token.value if token is not None else None
+
+    def take(self):
+        """
+        Returns the current token and advances past it.
+        """
+        token = self.tokens.peek()
+        if token is None:
+            raise self.error("Unexpected end of file.", token)
         self.advance_token()
+        return token
 
-    def get_current_token(self):
+    def expect(self, value: str, message: str):
         """
-        Returns the current token as a (key, value) tuple.
+        Consumes the current token if it has the given value.
+
+        Args:
+            value (str): Expected token value
+            message (str): Error message if the token doesnt match
+
+        Returns:
+            token (Token): The consumed token
         """
-        if self.curr_token:
-            key, value = next(iter(self.curr_token.items()))  # Extract the key-value pair
-            return key, value
-        else:
-            raise IndexError("No more tokens available.")
+        token = self.tokens.peek()
+        if token is None or token.value != value:
+            raise self.error(message, token)
+        self.advance_token()
+        return token
 
-    def write_token(self, key, value):
+    def expect_kind(self, kind: int, message: str):
         """
-        Writes the current token to the XML file.
+        Consumes the current token if it is of the given kind.
+
+        Args:
+            kind (int): Expected token kind
+            message (str): Error message if the token doesnt match
+
+        Returns:
+            token (Token): The consumed token
         """
-        self.xml_file.write(f"<{key}> {value} </{key}>\n")
+        token = self.tokens.peek()
+        if token is None or token.kind != kind:
+            raise self.error(message, token)
+        self.advance_token()
+        return token
 
     def advance_token(self):
         """
         Advances to the next token.
         """
-        if self.token_types:
-            self.curr_token = self.token_types.pop(0)  # Set the next token as the current token
-        else:
-            self.curr_token = None
+        self.tokens.advance()
+
+    def error(self, message: str, token) -> SyntaxError:
+        """
+        Creates a syntax error at the position of a token.
+
+        Args:
+            message (str): Error message
+            token (Token): Offending token, None at the end of the tokens
+
+        Returns:
+            error (SyntaxError): Error with the line and column of the token, if they are known
+        """
+        if token is None or not token.line:
+            return SyntaxError(message)
+        return SyntaxError(message, (None, token.line, token.column, None))
+
+    def recover(self, error: SyntaxError, sync: frozenset):
+        """
+        Records a syntax error and skips the rest of the broken statement or declaration.
+
+        Args:
+            error (SyntaxError): The error to record
+            sync (frozenset): Token values that start the next statement or declaration
+        """
+        self.errors.append(error)
+        self.synchronize(sync)
+
+    def synchronize(self, sync: frozenset):
+        """
+        Skips tokens up to the next token in sync, past the next ';', or up to
+        the '}' that closes the enclosing block. Blocks opened on the way are
+        skipped whole, so their statements arent mistaken for the next ones.
+
+        Args:
+            sync (frozenset): Token values to stop at
+        """
+        depth = 0
+        token = self.tokens.peek()
+        while token is not None:
+            value = token.value
+            if value == "{":
+                depth += 1
+            elif value == "}":
+                if depth == 0:
+                    return
+                depth -= 1
+            elif depth == 0:
+                if value in sync:
+                    return
+                if value == ";":
+                    self.advance_token()
+                    return
+            self.advance_token()
+            token = self.tokens.peek()
@@ -0,0 +1,132 @@
+"""This module contains the compact token representation"""
+import sys
+from collections import deque
+
+###############################
+#  Token kinds
+###############################
+KEYWORD = 0
+SYMBOL = 1
+INT_CONST = 2
+STRING_CONST = 3
+IDENTIFIER = 4
+UNKNOWN = 5
+
+# Names used as xml tags, indexed by kind
+KIND_NAMES = ("KEYWORD", "SYMBOL", "INT_CONST", "STRING_CONST", "IDENTIFIER", "UNKNOWN")
+KIND_IDS = {name: kind for kind, name in enumerate(KIND_NAMES)}
+
+
+class Token:
+    """
+    Single token with a small int kind, an interned value and its source position.
+    Line and column start at 1, 0 means the position is unknown.
+    """
+    __slots__ = ("kind", "value", "line", "column")
+
+    def __init__(self, kind: int, value: str, line: int = 0, column: int = 0):
+        self.kind = kind
+        self.value = sys.intern(value)
+        self.line = line
+        self.column = column
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the name of the token kind.
+        """
+        return KIND_NAMES[self.kind]
+
+    def __repr__(self):
+        return f"Token({KIND_NAMES[self.kind]}, {self.value!r})"
+
+
+def bytes_per_token(tokens: list) -> float:
+    """
+    Measures the average memory used by a token.
+    Interned values are shared, so each distinct value is only counted once.
+
+    Args:
+        tokens (list): List of tokens
+
+    Returns:
+        size (float): Average size of a token in bytes
+    """
+    if not tokens:
+        return 0.0
+    token_bytes = sum(sys.getsizeof(token) for token in tokens)
+    values = {id(token.value): token.value for token in tokens}
+    value_bytes = sum(sys.getsizeof(value) for value in values.values())
+    return (token_bytes + value_bytes) / len(tokens)
+
+
+class TokenStream:
+    """
+    Read only view over a list of tokens with an index cursor.
+    """
+    __slots__ = ("tokens", "index")
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self, k: int = 0):
+        """
+        Looks ahead without moving the cursor.
+
+        Args:
+            k (int): Offset from the current token
+
+        Returns:
+            token (Token): Token at the offset, or None past the end
+        """
+        index = self.index + k
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return None
+
+    def advance(self):
+        """
+        Moves the cursor to the next token.
+        """
+        self.index += 1
+
+
+class LazyTokenStream:
+    """
+    Cursor over a token iterator with a small lookahead buffer.
+    Tokens are pulled from the iterator only when peeked at, and dropped
+    once the cursor moves past them.
+    """
+    __slots__ = ("tokens", "buffer")
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.buffer = deque()
+
+    def peek(self, k: int = 0):
+        """
+        Looks ahead without moving the cursor.
+
+        Args:
+            k (int): Offset from the current token
+
+        Returns:
+            token (Token): Token at the offset, or None past the end
+        """
+        buffer = self.buffer
+        while len(buffer) <= k:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            buffer.append(token)
+        return buffer[k]
+
+    def advance(self):
+        """
+        Moves the cursor to the next token.
+        """
+        if self.buffer:
+            self.buffer.popleft()
+        else:
+            next(self.tokens, None)
@@ -1,5 +1,17 @@
 """This module is used to tokenize lines of jack code"""
-import config
+import re
+from . import config
+from .jack_token import Token, KIND_IDS, KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER, UNKNOWN
+
+# Master pattern used by the single pass tokenizer. Whitespace is never
+# matched, so finditer skips over it for free.
+TOKEN_PATTERN = re.compile(
+    r'(?P<STRING_CONST>"[^"\n]*")'
+    r"|(?P<WORD>[A-Za-z_]\w*)"
+    r"|(?P<NUMBER>\d\w*)"
+    r"|(?P<SYMBOL>[" + re.escape("".join(config.symbols)) + r"])"
+    r"|(?P<UNKNOWN>\S)"
+)
 
 class JackTokenizer:
     """
@@ -8,15 +20,56 @@ class JackTokenizer:
     def __init__(self):
         self.curr_line = None
 
+    def tokenize(self, buffer: str):
+        """
+        Tokenizes a whole buffer in one pass using the master pattern.
+        Every token records the line and column it starts at.
+
+        Args:
+            buffer (str): JACK code without comments
+
+        Returns:
+            token_types (list): List of tokens.
+        """
+        # Tokens never span lines, so matching line by line gives the positions for free
+        return list(self.tokenize_lines(buffer.split("\n")))
+
+    def tokenize_lines(self, lines):
+        """
+        Tokenizes lines lazily with the master pattern, tokens never span lines.
+        Every token records the line and column it starts at.
+
+        Args:
+            lines (iterable): Lines of JACK code without comments
+
+        Yields:
+            token (Token): The next token
+        """
+        keywords = config.KEYWORDS
+        finditer = TOKEN_PATTERN.finditer
+
+        for line_number, line in enumerate(lines, 1):
+            for match in finditer(line):
+                group = match.lastgroup
+                token = match.group()
+                if group == "WORD":
+                    kind = KEYWORD if token in keywords else IDENTIFIER
+                elif group == "NUMBER":
+                    kind = INT_CONST if token.isdigit() else UNKNOWN
+                else:
+                    kind = KIND_IDS[group]
+                yield Token(kind, token, line_number, match.start() + 1)
+
     def tokenize_line(self, line: str):
         """
-        Tokenizes the line.
+        Tokenizes the line character by character.
+        Legacy tokenizer, kept for throughput comparisons with tokenize.
 
         Args:
             line (str): JACK code line
 
         Returns:
-            token_types (list): List containing strings and their types.
+            token_types (list): List of tokens.
         """
 
         # Initialize vars
@@ -32,7 +85,7 @@ class JackTokenizer:
                 if token:  # If there's a token being built, add it first
                     token_types.append(self.classify_token(token))
                     token = ""
-                token_types.append({"SYMBOL": char})
+                token_types.append(Token(SYMBOL, char))
             elif char.isspace():  # Handle whitespace as a token delimiter
                 if token:
                     token_types.append(self.classify_token(token))
@@ -51,11 +104,11 @@ class JackTokenizer:
         Classify a token and return its type.
         """
         if token.isdigit():
-            return {"INT_CONST": token}
+            return Token(INT_CONST, token)
         if token.replace('"', '').isalpha() and '"' in token:
-            return {"STRING_CONST": token}
+            return Token(STRING_CONST, token)
         if not token[0].isdigit():
             if token in config.keywords:
-                return {"KEYWORD": token}
-            return {"IDENTIFIER": token}
-        return {"UNKNOWN": token}
+                return Token(KEYWORD, token)
+            return Token(IDENTIFIER, token)
+        return Token(UNKNOWN, token)
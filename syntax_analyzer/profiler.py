@@ -0,0 +1,108 @@
+"""This module contains the opt-in instrumentation of the compiler stages"""
+import json
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+
+class Profiler:
+    """
+    Records call counts and cumulative times of compile_* methods, and
+    token counts and tokenizer times per file.
+    Methods are only wrapped on instances passed to instrument, so
+    uninstrumented code runs without any overhead.
+    """
+    def __init__(self):
+        self.calls = Counter()
+        # Inclusive time, recursive calls are only counted at the outermost level
+        self.cumulative = defaultdict(float)
+        self.depth = Counter()
+        # file path -> statistics of the file
+        self.files = {}
+
+    def instrument(self, obj, prefix: str = "compile_"):
+        """
+        Wraps every method of an object whose name starts with the prefix.
+
+        Args:
+            obj (object): Object to instrument, e.g. a JackCompEngine
+            prefix (str): Prefix of the methods to wrap
+        """
+        owner = type(obj).__name__
+        for name in dir(type(obj)):
+            if name.startswith(prefix) and callable(getattr(obj, name)):
+                setattr(obj, name, self.wrap(f"{owner}.{name}", getattr(obj, name)))
+
+    def wrap(self, key: str, method):
+        """
+        Returns a wrapper that times a bound method.
+        """
+        calls = self.calls
+        cumulative = self.cumulative
+        depth = self.depth
+        perf_counter = time.perf_counter
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            calls[key] += 1
+            depth[key] += 1
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth[key] -= 1
+                if depth[key] == 0:
+                    cumulative[key] += perf_counter() - start
+        return timed
+
+    def record_file(self, file: str, tokens: int, lines: int, tokenize_seconds: float, max_line_seconds: float = None):
+        """
+        Records the tokenizer statistics of a file.
+
+        Args:
+            file (str): Path of the jack file
+            tokens (int): Number of tokens
+            lines (int): Number of source lines
+            tokenize_seconds (float): Time spent in the tokenizer
+            max_line_seconds (float): Slowest line, only known for the line by line tokenizer
+        """
+        self.files[file] = {
+            "tokens": tokens,
+            "lines": lines,
+            "tokenize_seconds": tokenize_seconds,
+            "tokenize_us_per_line": tokenize_seconds / lines * 1e6 if lines else 0.0,
+            "max_line_us": max_line_seconds * 1e6 if max_line_seconds is not None else None,
+        }
+
+    def report(self) -> dict:
+        """
+        Returns the collected data.
+
+        Returns:
+            report (dict): Method statistics sorted by cumulative time and file statistics
+        """
+        methods = {
+            key: {"calls": self.calls[key], "cumulative_seconds": self.cumulative[key]}
+            for key in sorted(self.calls, key=lambda key: -self.cumulative[key])
+        }
+        return {"methods": methods, "files": self.files}
+
+    def format_text(self) -> str:
+        """
+        Returns the collected data as a text report.
+        """
+        report = self.report()
+        lines = [f"{'method':<45} {'calls':>10} {'cumulative ms':>14}"]
+        for key, stats in report["methods"].items():
+            lines.append(f"{key:<45} {stats['calls']:>10} {stats['cumulative_seconds'] * 1000:>14.2f}")
+        lines.append("")
+        lines.append(f"{'file':<45} {'tokens':>10} {'lines':>8} {'us/line':>10}")
+        for file, stats in report["files"].items():
+            lines.append(f"{file:<45} {stats['tokens']:>10} {stats['lines']:>8} {stats['tokenize_us_per_line']:>10.2f}")
+        return "\n".join(lines)
+
+    def format_json(self) -> str:
+        """
+        Returns the collected data as JSON.
+        """
+        return json.dumps(self.report(), indent=2)
@@ -0,0 +1,114 @@
+"""This module is used to load jack source files"""
+import mmap
+import os
+import re
+
+# Files at least this big are memory mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+
+# String constants are matched too, so comment markers inside them are kept
+_COMMENT_REGEX = r'"[^"\n]*"|//[^\n]*|/\*.*?(?:\*/|\Z)'
+COMMENT_PATTERN = re.compile(_COMMENT_REGEX, re.DOTALL)
+COMMENT_PATTERN_BYTES = re.compile(_COMMENT_REGEX.encode(), re.DOTALL)
+
+
+def blank_comment(match):
+    """
+    Replaces a comment so every line keeps its number and column offsets.
+    String constants are returned unchanged.
+
+    Args:
+        match (re.Match): Matched comment or string constant
+
+    Returns:
+        replacement (str | bytes): Text that replaces the match
+    """
+    text = match.group()
+    if isinstance(text, str):
+        quote, newline, space = '"', "\n", " "
+    else:
+        quote, newline, space = b'"', b"\n", b" "
+    if text[:1] == quote:
+        return text
+    # Only block comments can contain newlines
+    last_newline = text.rfind(newline)
+    if last_newline == -1:
+        return space * len(text)
+    return newline * text.count(newline) + space * (len(text) - last_newline - 1)
+
+
+def strip_comments(source: str) -> str:
+    """
+    Removes // and /* */ comments in a single pass.
+
+    Args:
+        source (str): JACK source code
+
+    Returns:
+        code (str): Source code with comments blanked out
+    """
+    return COMMENT_PATTERN.sub(blank_comment, source)
+
+
+def load_source(path: str) -> str:
+    """
+    Reads a jack file in one go and strips its comments.
+    Large files are memory mapped and stripped without an extra copy.
+
+    Args:
+        path (str): Path of the jack file
+
+    Returns:
+        code (str): Source code with comments blanked out
+    """
+    with open(path, "rb") as jack_file:
+        if os.fstat(jack_file.fileno()).st_size < MMAP_THRESHOLD:
+            return strip_comments(jack_file.read().decode())
+        with mmap.mmap(jack_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return COMMENT_PATTERN_BYTES.sub(blank_comment, mapped).decode()
+
+
+def opens_block_comment(line: str) -> bool:
+    """
+    Checks if a line ends inside a block comment that continues on the next line.
+
+    Args:
+        line (str): Line of JACK source code
+
+    Returns:
+        open (bool): True if the last block comment of the line isnt closed
+    """
+    last = None
+    for last in COMMENT_PATTERN.finditer(line):
+        pass
+    if last is None:
+        return False
+    text = last.group()
+    return text.startswith("/*") and not (len(text) >= 4 and text.endswith("*/"))
+
+
+def read_lines(path: str):
+    """
+    Reads a jack file lazily and strips its comments line by line.
+    Only the current line is held in memory. Lines inside block comments
+    are yielded empty, so line numbers stay the same.
+
+    Args:
+        path (str): Path of the jack file
+
+    Yields:
+        line (str): Source line with comments blanked out
+    """
+    in_comment = False
+    with open(path) as jack_file:
+        for line in jack_file:
+            if in_comment:
+                end = line.find("*/")
+                if end == -1:
+                    yield "\n" if line.endswith("\n") else ""
+                    continue
+                line = " " * (end + 2) + line[end + 2:]
+                in_comment = False
+            if "/*" in line:
+                in_comment = opens_block_comment(line)
+            yield COMMENT_PATTERN.sub(blank_comment, line)
@@ -0,0 +1,170 @@
+"""This module recompiles the changed files of a directory with a warm analyzer"""
+import hashlib
+import os
+import sys
+import time
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 0.2
+
+
+def file_digest(file: str) -> str:
+    """
+    Hashes the content of a file.
+
+    Args:
+        file (str): Path of the file
+
+    Returns:
+        digest (str): Hex digest of the content, None if the file cant be read
+    """
+    try:
+        with open(file, "rb") as source_file:
+            return hashlib.blake2b(source_file.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+class Watcher:
+    """
+    Polls a directory and recompiles the files whose content changed.
+    The analyzer stays in memory between rebuilds, so a rebuild only pays
+    for the changed files.
+    """
+    def __init__(
+        self,
+        analyzer,
+        input_dir: str,
+        dir_path: str = "xml_files",
+        interval: float = DEFAULT_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ):
+        """
+        Args:
+            analyzer (JackAnalyzer): Analyzer used for the rebuilds
+            input_dir (str): Directory containing the jack files
+            dir_path (str): Output directory
+            interval (float): Seconds between two polls
+            debounce (float): Seconds the directory has to stay unchanged before a rebuild
+        """
+        self.analyzer = analyzer
+        self.input_dir = input_dir
+        self.dir_path = dir_path
+        self.interval = interval
+        self.debounce = debounce
+        # file path -> (mtime_ns, size) of the last poll
+        self.stats = {}
+        # file path -> content digest of the last build
+        self.digests = {}
+
+    def snapshot(self) -> dict:
+        """
+        Reads the mtime and size of every jack file below the input directory.
+
+        Returns:
+            stats (dict): file path -> (mtime_ns, size)
+        """
+        stats = {}
+        for file in self.analyzer.list_files(self.input_dir):
+            try:
+                stat = os.stat(file)
+            except OSError:
+                # Deleted between the listing and the stat
+                continue
+            stats[file] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def start(self):
+        """
+        Records the current state of the directory as already built.
+        """
+        self.stats = self.snapshot()
+        self.digests = {file: file_digest(file) for file in self.stats}
+
+    def poll(self) -> tuple:
+        """
+        Waits until a burst of saves is over and finds the changed files.
+        Files whose mtime changed but whose content didnt are skipped.
+
+        Returns:
+            changes (tuple): Sorted lists of the changed and the deleted files
+        """
+        stats = self.snapshot()
+        if stats == self.stats:
+            return [], []
+        # Debounce, wait until the directory stops changing
+        while True:
+            time.sleep(self.debounce)
+            settled = self.snapshot()
+            if settled == stats:
+                break
+            stats = settled
+
+        changed = []
+        for file, stat in stats.items():
+            if self.stats.get(file) == stat:
+                continue
+            digest = file_digest(file)
+            if digest != self.digests.get(file):
+                self.digests[file] = digest
+                changed.append(file)
+        deleted = sorted(set(self.stats) - set(stats))
+        for file in deleted:
+            self.digests.pop(file, None)
+        self.stats = stats
+        return sorted(changed), deleted
+
+    def rebuild(self, files: list) -> list:
+        """
+        Recompiles files the same way a normal run does, build cache included,
+        and prints how long the rebuild took.
+
+        Args:
+            files (list): Paths of the changed jack files
+
+        Returns:
+            failures (list): (file path, diagnostics) pairs of the files that failed
+        """
+        start = time.perf_counter()
+        failures = self.analyzer.manipulate_files(self.input_dir, dir_path=self.dir_path, file_paths=files)
+        elapsed = time.perf_counter() - start
+        print(
+            f"rebuilt {len(files)} file(s) in {elapsed * 1000:.1f} ms, {len(failures)} failed",
+            file=sys.stderr,
+        )
+        return failures
+
+    def remove_outputs(self, files: list):
+        """
+        Deletes the xml files of deleted jack files, so the output directory
+        keeps mirroring the sources.
+
+        Args:
+            files (list): Paths of the deleted jack files
+        """
+        for file in files:
+            output_dir = self.analyzer.get_output_dir(file, self.input_dir, self.dir_path)
+            try:
+                os.remove(self.analyzer.get_xml_path(file, output_dir))
+            except FileNotFoundError:
+                pass
+            print(f"{file}: deleted", file=sys.stderr)
+
+    def run(self, max_rebuilds: int = None):
+        """
+        Polls the directory until interrupted.
+        Files that are not known from start count as changed.
+
+        Args:
+            max_rebuilds (int): Stop after this many rebuilds, runs forever by default
+        """
+        rebuilds = 0
+        print(f"watching {self.input_dir}", file=sys.stderr)
+        while max_rebuilds is None or rebuilds < max_rebuilds:
+            changed, deleted = self.poll()
+            self.remove_outputs(deleted)
+            if changed:
+                self.rebuild(changed)
+                rebuilds += 1
+            else:
+                time.sleep(self.interval)
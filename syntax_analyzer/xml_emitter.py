@@ -0,0 +1,128 @@
+"""This module contains the output emitters used by the comp engine"""
+from .jack_ast import NodeVisitor
+from .jack_token import KIND_NAMES
+
+# Precomputed table for escaping token values
+XML_ESCAPES = str.maketrans({
+    "<": "&lt;",
+    ">": "&gt;",
+    "&": "&amp;",
+    '"': "&quot;"
+})
+
+
+class XmlEmitter:
+    """
+    Buffered xml writer. Output is collected in memory and written to
+    the file in large batches.
+    """
+    def __init__(self, xml_file, buffer_size: int = 1 << 16):
+        self.xml_file = xml_file
+        self.buffer_size = buffer_size
+        self.chunks = []
+        self.size = 0
+
+    def open_tag(self, tag: str):
+        """
+        Writes an opening tag of a grammar rule.
+
+        Args:
+            tag (str): Name of the rule
+        """
+        self.write(f"<{tag}>\n")
+
+    def close_tag(self, tag: str):
+        """
+        Writes a closing tag of a grammar rule.
+
+        Args:
+            tag (str): Name of the rule
+        """
+        self.write(f"</{tag}>\n")
+
+    def write_token(self, key: str, value: str):
+        """
+        Writes a token, escaping its value.
+
+        Args:
+            key (str): Token kind
+            value (str): Token value
+        """
+        self.write(f"<{key}> {value.translate(XML_ESCAPES)} </{key}>\n")
+
+    def write(self, text: str):
+        """
+        Adds text to the buffer and flushes it once it is full.
+
+        Args:
+            text (str): Text to write
+        """
+        self.chunks.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered text to the file.
+        """
+        if self.chunks:
+            self.xml_file.write("".join(self.chunks))
+            self.chunks = []
+            self.size = 0
+
+
+class NullEmitter:
+    """
+    Emitter that throws the output away. Used for parse only benchmarks.
+    """
+    def open_tag(self, tag: str):
+        """
+        Ignores an opening tag.
+        """
+
+    def close_tag(self, tag: str):
+        """
+        Ignores a closing tag.
+        """
+
+    def write_token(self, key: str, value: str):
+        """
+        Ignores a token.
+        """
+
+    def write(self, text: str):
+        """
+        Ignores text.
+        """
+
+    def flush(self):
+        """
+        Nothing to flush.
+        """
+
+
+class XmlWriter(NodeVisitor):
+    """
+    Writes a syntax tree as xml through an emitter.
+    """
+    def __init__(self, emitter):
+        self.emitter = emitter
+
+    def generic_visit(self, node):
+        """
+        Writes a node wrapped in its tag. Nodes without a tag only write their children.
+        """
+        tag = node.tag
+        if tag:
+            self.emitter.open_tag(tag)
+        for child in node.children:
+            self.visit(child)
+        if tag:
+            self.emitter.close_tag(tag)
+
+    def visit_token(self, token):
+        """
+        Writes a token.
+        """
+        self.emitter.write_token(KIND_NAMES[token.kind], token.value)
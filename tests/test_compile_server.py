@@ -0,0 +1,112 @@
+"""Tests of the compile server"""
+import io
+import json
+import threading
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from syntax_analyzer.compile_server import CompileServer
+
+SOURCE = 'class Main { function void main() { do Output.printString("a b"); return; } }'
+
+
+def serve(server: CompileServer, requests: list) -> list:
+    """
+    Sends requests to a server and returns its responses sorted by id.
+    """
+    output_file = io.StringIO()
+    server.serve_lines([json.dumps(request) + "\n" for request in requests], output_file)
+    responses = [json.loads(line) for line in output_file.getvalue().splitlines()]
+    return sorted(responses, key=lambda response: response["id"])
+
+
+class BrokenExecutor:
+    """
+    Executor whose workers always die.
+    """
+    def submit(self, *_):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A worker died."))
+        return future
+
+    def shutdown(self):
+        pass
+
+
+class HeldExecutor:
+    """
+    Executor whose requests stay pending until they are released.
+    """
+    def __init__(self):
+        self.futures = []
+        self.submitted = threading.Semaphore(0)
+
+    def submit(self, _function, _compile_request, request):
+        future = Future()
+        future.request = request
+        self.futures.append(future)
+        self.submitted.release()
+        return future
+
+    def release(self):
+        for future in self.futures:
+            if not future.done():
+                future.set_result({"id": future.request["id"], "ok": True, "output": ""})
+
+    def shutdown(self):
+        pass
+
+
+class CompileServerTest(unittest.TestCase):
+    """
+    Requests answered in process and by worker processes.
+    """
+    def test_tokens_follow_the_tokenizer_setting(self):
+        request = {"id": 1, "source": SOURCE, "output": "tokens"}
+        tokens = serve(CompileServer(), [request])[0]["output"]
+        legacy_tokens = serve(CompileServer(legacy_tokenizer=True), [request])[0]["output"]
+        self.assertIn(["STRING_CONST", '"a b"'], tokens)
+        self.assertNotIn(["STRING_CONST", '"a b"'], legacy_tokens)
+
+    def test_workers(self):
+        server = CompileServer(jobs=2)
+        try:
+            responses = serve(server, [{"id": 1, "source": SOURCE}, {"id": 2, "source": "class"}])
+        finally:
+            server.close()
+        self.assertTrue(responses[0]["ok"])
+        self.assertIn("<subroutineDec>", responses[0]["output"])
+        self.assertFalse(responses[1]["ok"])
+
+    def test_dead_worker_is_answered(self):
+        server = CompileServer(jobs=2)
+        server.close()
+        server.executor = BrokenExecutor()
+        responses = serve(server, [{"id": 7, "source": SOURCE}])
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(responses[0]["id"], 7)
+        self.assertFalse(responses[0]["ok"])
+        self.assertIn("BrokenProcessPool", responses[0]["error"])
+
+    def test_pending_requests_are_bounded(self):
+        server = CompileServer(jobs=2)
+        server.close()
+        server.executor = executor = HeldExecutor()
+        output_file = io.StringIO()
+        requests = [json.dumps({"id": request_id, "source": SOURCE}) + "\n" for request_id in range(10)]
+        reader = threading.Thread(target=server.serve_lines, args=(requests, output_file), daemon=True)
+        reader.start()
+        for _ in range(4):
+            self.assertTrue(executor.submitted.acquire(timeout=5))
+        # The reader waits for answers once 2 * jobs requests are pending
+        self.assertFalse(executor.submitted.acquire(timeout=0.2))
+        self.assertEqual(len(executor.futures), 4)
+        while reader.is_alive():
+            executor.release()
+            reader.join(0.01)
+        responses = [json.loads(line) for line in output_file.getvalue().splitlines()]
+        self.assertEqual(sorted(response["id"] for response in responses), list(range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
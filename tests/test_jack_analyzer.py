@@ -0,0 +1,68 @@
+"""Tests of the analyzer"""
+import os
+import tempfile
+import unittest
+from syntax_analyzer.jack_analyzer import JackAnalyzer
+from syntax_analyzer.profiler import Profiler
+
+GOOD = "class Main { function void main() { return; } }"
+BROKEN = "class Main { function void main() { let = ; return; } }"
+
+
+class FailedCompileTest(unittest.TestCase):
+    """
+    A file with syntax errors leaves the previous xml output alone.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.jack_path = os.path.join(self.tmp_dir.name, "Main.jack")
+        self.output_dir = os.path.join(self.tmp_dir.name, "xml")
+
+    def compile(self, source: str, **options) -> list:
+        with open(self.jack_path, "w") as jack_file:
+            jack_file.write(source)
+        analyzer = JackAnalyzer(**options)
+        return analyzer.manipulate_files(self.jack_path, dir_path=self.output_dir)
+
+    def check_output_kept(self, **options):
+        self.assertEqual(self.compile(GOOD, **options), [])
+        xml_path = os.path.join(self.output_dir, "Main.xml")
+        with open(xml_path) as xml_file:
+            good_xml = xml_file.read()
+        self.assertEqual(len(self.compile(BROKEN, **options)), 1)
+        with open(xml_path) as xml_file:
+            self.assertEqual(xml_file.read(), good_xml)
+        self.assertEqual(os.listdir(self.output_dir), ["Main.xml"])
+
+    def test_serial(self):
+        self.check_output_kept(io_threads=0)
+
+    def test_threaded(self):
+        self.check_output_kept()
+
+    def test_streaming(self):
+        self.check_output_kept(streaming=True)
+
+
+class ProfileTest(unittest.TestCase):
+    """
+    Streaming compiles record the same tokenizer statistics as buffered ones.
+    """
+    def test_streaming_records_tokens(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jack_path = os.path.join(tmp_dir, "Main.jack")
+            with open(jack_path, "w") as jack_file:
+                jack_file.write(GOOD)
+            counts = []
+            for streaming in (False, True):
+                profiler = Profiler()
+                analyzer = JackAnalyzer(profiler=profiler, streaming=streaming)
+                self.assertEqual(analyzer.manipulate_files(jack_path, dir_path=os.path.join(tmp_dir, "xml")), [])
+                counts.append(profiler.report()["files"][jack_path]["tokens"])
+        self.assertEqual(counts[1], counts[0])
+        self.assertGreater(counts[1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Tests of the peephole optimizer"""
+import unittest
+from code_generator.jack_compiler import JackCompiler
+from code_generator.peephole import PeepholeOptimizer
+from code_generator.vm_interpreter import run_sources
+
+NON_BOOLEAN_IF = """
+class Main {
+    function void main() {
+        var int x;
+        let x = 5;
+        if (x) {} else { do Output.printInt(99); }
+        do Output.printInt(1);
+        return;
+    }
+}
+"""
+
+NON_BOOLEAN_WHILE = """
+class Main {
+    function void main() {
+        var int x;
+        let x = 3;
+        while (x) {
+            do Output.printInt(x);
+            let x = x - 1;
+        }
+        return;
+    }
+}
+"""
+
+
+class NegatedBranchTest(unittest.TestCase):
+    """
+    not / if-goto is only a negated branch for boolean conditions.
+    """
+    def test_comparison_is_rewritten(self):
+        optimized = PeepholeOptimizer(["negated_branch"]).optimize([
+            ("lt",), ("not",), ("if-goto", "L1"), ("goto", "L2"), ("label", "L1"),
+        ])
+        self.assertEqual(optimized, [("lt",), ("if-goto", "L2"), ("label", "L1")])
+
+    def test_int_condition_is_kept(self):
+        instructions = [
+            ("push", "local", 0), ("not",), ("if-goto", "L1"), ("goto", "L2"), ("label", "L1"),
+        ]
+        self.assertEqual(PeepholeOptimizer(["negated_branch"]).optimize(instructions), instructions)
+
+    def test_int_condition_runs_the_same(self):
+        for source in (NON_BOOLEAN_IF, NON_BOOLEAN_WHILE):
+            plain = run_sources([source]).output
+            optimized = run_sources([source], compiler=JackCompiler(optimizer=PeepholeOptimizer())).output
+            self.assertEqual(optimized, plain)
+        # not 5 is -6, so the unoptimized code takes the else branch
+        self.assertEqual(run_sources([NON_BOOLEAN_IF]).output, "991")
+
+
+if __name__ == "__main__":
+    unittest.main()
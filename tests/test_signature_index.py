@@ -0,0 +1,71 @@
+"""Tests of the project signature index"""
+import os
+import tempfile
+import unittest
+from code_generator.jack_compiler import JackCompiler
+from code_generator.signature_index import SignatureIndex
+
+MAIN = """
+class Main {
+    function void main() {
+        do Util.go(%s);
+        return;
+    }
+}
+"""
+
+UTIL = """
+class Util {
+    function void go(%s) {
+        return;
+    }
+}
+"""
+
+
+def write_project(dir_path: str, arguments: str, parameters: str):
+    """
+    Writes a project whose Main calls Util.go.
+    """
+    os.makedirs(dir_path)
+    with open(os.path.join(dir_path, "Main.jack"), "w") as jack_file:
+        jack_file.write(MAIN % arguments)
+    with open(os.path.join(dir_path, "Util.jack"), "w") as jack_file:
+        jack_file.write(UTIL % parameters)
+
+
+class SharedIndexTest(unittest.TestCase):
+    """
+    Projects with the same class names compiled one after the other.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.project_a = os.path.join(self.tmp_dir.name, "a")
+        self.project_b = os.path.join(self.tmp_dir.name, "b")
+        write_project(self.project_a, "", "")
+        write_project(self.project_b, "1", "int x")
+
+    def compile(self, project: str, index_path: str) -> list:
+        compiler = JackCompiler(index=SignatureIndex(index_path))
+        return compiler.compile_files(project, os.path.join(project, "out"))
+
+    def test_shared_index_file(self):
+        index_path = os.path.join(self.tmp_dir.name, "index.json")
+        self.assertEqual(self.compile(self.project_a, index_path), [])
+        self.assertEqual(self.compile(self.project_b, index_path), [])
+        # A is unchanged, its Util must not be taken from B
+        self.assertEqual(self.compile(self.project_a, index_path), [])
+        self.assertEqual(self.compile(self.project_b, index_path), [])
+
+    def test_index_in_memory(self):
+        index = SignatureIndex(None)
+        compiler = JackCompiler(index=index)
+        self.assertEqual(compiler.compile_files(self.project_a, os.path.join(self.project_a, "out")), [])
+        self.assertEqual(compiler.compile_files(self.project_b, os.path.join(self.project_b, "out")), [])
+        self.assertEqual(compiler.compile_files(self.project_a, os.path.join(self.project_a, "out")), [])
+        self.assertEqual(index.lookup("Util", "go").n_args, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""End to end tests that compile jack classes and run them in the vm interpreter"""
+import os
+import tempfile
+import unittest
+from code_generator.jack_compiler import JackCompiler
+from code_generator.peephole import PeepholeOptimizer
+from code_generator.constant_folder import ConstantFolder
+from code_generator.strength_reduction import StrengthReducer
+from code_generator.vm_encoding import VmProgram, read_program, write_program
+from code_generator.vm_interpreter import VmInterpreter, run_sources
+
+MAIN = """
+class Main {
+    static int calls;
+
+    function int fact(int n) {
+        let calls = calls + 1;
+        if (n < 2) {
+            return 1;
+        }
+        return n * Main.fact(n - 1);
+    }
+
+    function void main() {
+        var Array squares;
+        var int i, sum, x;
+        var String text;
+        var Point point;
+        let squares = Array.new(10);
+        let i = 0;
+        while (i < 10) {
+            let squares[i] = i * i;
+            let i = i + 1;
+        }
+        let i = 0;
+        let sum = 0;
+        while (i < 10) {
+            let sum = sum + squares[i];
+            let i = i + 1;
+        }
+        do Output.printInt(sum);
+        do Output.println();
+        do Output.printInt(Main.fact(7));
+        do Output.printInt(calls);
+        do Output.println();
+        let x = 37;
+        do Output.printInt(x * 8);
+        do Output.printInt(x / 4);
+        do Output.printInt(-x / 4);
+        do Output.printInt((2 + 3) * (10 - 4));
+        do Output.printInt(32767 + 1);
+        do Output.println();
+        do Output.printString("Hello");
+        let text = String.new(4);
+        do text.appendChar(72);
+        do text.appendChar(105);
+        do Output.printString(text);
+        do Output.printInt(text.length());
+        do Output.println();
+        let point = Point.new(3, -4);
+        do Output.printInt(point.dist2());
+        do Output.println();
+        // Ints used as conditions: not is bitwise, so not 5 is -6, which is nonzero and
+        // takes the else branch and leaves the loop
+        let x = 5;
+        if (x) {} else { do Output.printInt(99); }
+        while (x) {
+            do Output.printInt(x);
+            let x = 0;
+        }
+        do Output.printInt(1);
+        return;
+    }
+}
+"""
+
+POINT = """
+class Point {
+    field int x, y;
+
+    constructor Point new(int ax, int ay) {
+        let x = ax;
+        let y = ay;
+        return this;
+    }
+
+    method int dist2() {
+        return (x * x) + (y * y);
+    }
+}
+"""
+
+EXPECTED = "285\n50407\n2969-930-32768\nHelloHi2\n25\n991"
+
+COMPILERS = {
+    "plain": lambda: JackCompiler(),
+    "optimize": lambda: JackCompiler(
+        optimizer=PeepholeOptimizer(), folder=ConstantFolder(), reducer=StrengthReducer()
+    ),
+    "fold": lambda: JackCompiler(folder=ConstantFolder()),
+    "strength_reduce": lambda: JackCompiler(reducer=StrengthReducer()),
+    "peephole": lambda: JackCompiler(optimizer=PeepholeOptimizer()),
+}
+
+
+class RunTest(unittest.TestCase):
+    """
+    Every compiler configuration gives the same program behavior.
+    """
+    def test_compilers(self):
+        for name, make_compiler in COMPILERS.items():
+            with self.subTest(compiler=name):
+                interpreter = run_sources([MAIN, POINT], compiler=make_compiler())
+                self.assertEqual(interpreter.output, EXPECTED)
+
+    def test_text_input(self):
+        compiler = JackCompiler()
+        programs = [compiler.compile_source(source) for source in (MAIN, POINT)]
+        interpreter = VmInterpreter(programs)
+        interpreter.run()
+        self.assertEqual(interpreter.output, EXPECTED)
+
+    def test_binary_round_trip(self):
+        compiler = JackCompiler()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            programs = []
+            for name, source in (("Main", MAIN), ("Point", POINT)):
+                vm_lines = compiler.compile_source(source)
+                instructions = compiler.code_generator.get_instructions()
+                vmb_path = os.path.join(tmp_dir, f"{name}.vmb")
+                write_program(vmb_path, instructions, "binary")
+                program = read_program(vmb_path)
+                self.assertEqual(program.to_text(), vm_lines)
+                self.assertEqual(VmProgram.from_text(vm_lines).to_bytes(), program.to_bytes())
+                programs.append(program)
+        interpreter = VmInterpreter(programs)
+        interpreter.run()
+        self.assertEqual(interpreter.output, EXPECTED)
+
+    def test_return_value(self):
+        source = (
+            "class Main { function int main() { return Main.twice(21); }"
+            " function int twice(int x) { return x + x; } }"
+        )
+        self.assertEqual(VmInterpreter([JackCompiler().compile_source(source)]).run(), 42)
+
+    def test_instruction_budget(self):
+        source = "class Main { function void main() { while (true) {} return; } }"
+        with self.assertRaises(RuntimeError):
+            run_sources([source], max_instructions=10000)
+
+    def test_halt(self):
+        source = (
+            "class Main { function void main() {"
+            " do Output.printInt(1); do Sys.halt(); do Output.printInt(2); return; } }"
+        )
+        self.assertEqual(run_sources([source]).output, "1")
+
+    def test_stack_overflow(self):
+        recursion = (
+            "class Main { function void main() { do Main.down(0); return; }"
+            " function void down(int n) { do Main.down(n + 1); return; } }"
+        )
+        # The locals alone dont fit between the stack base and the heap
+        local_vars = ", ".join(f"v{index}" for index in range(1800))
+        large_frame = f"class Main {{ function void main() {{ var int {local_vars}; return; }} }}"
+        for name, source in (("call", recursion), ("enter", large_frame)):
+            with self.subTest(name), self.assertRaisesRegex(RuntimeError, "Stack overflow"):
+                run_sources([source])
+
+    def test_runs_start_from_a_clean_machine(self):
+        interpreter = run_sources([MAIN, POINT])
+        heap_pointer = interpreter.os.heap_pointer
+        interpreter.run()
+        self.assertEqual(interpreter.output, EXPECTED)
+        self.assertEqual(interpreter.os.heap_pointer, heap_pointer)
+
+
+if __name__ == "__main__":
+    unittest.main()
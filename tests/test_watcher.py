@@ -0,0 +1,56 @@
+"""Tests of the watch mode"""
+import os
+import tempfile
+import unittest
+from syntax_analyzer.build_cache import BuildCache
+from syntax_analyzer.jack_analyzer import JackAnalyzer
+from syntax_analyzer.watcher import Watcher
+
+MAIN = "class Main { function void main() { return; } }"
+CHANGED_MAIN = "class Main { function void main() { do Other.run(); return; } }"
+OTHER = "class Other { function void run() { return; } }"
+
+
+class WatcherTest(unittest.TestCase):
+    """
+    Rebuilds of a watch session match the outputs of a normal run.
+    """
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.input_dir = os.path.join(tmp_dir.name, "src")
+        self.output_dir = os.path.join(tmp_dir.name, "xml")
+        os.makedirs(os.path.join(self.input_dir, "lib"))
+        self.write("Main.jack", MAIN)
+        self.write(os.path.join("lib", "Other.jack"), OTHER)
+        self.cache = BuildCache(os.path.join(tmp_dir.name, "cache"))
+        self.analyzer = JackAnalyzer(cache=self.cache)
+        self.watcher = Watcher(self.analyzer, self.input_dir, dir_path=self.output_dir, interval=0, debounce=0)
+        self.watcher.start()
+        self.assertEqual(self.analyzer.manipulate_files(self.input_dir, dir_path=self.output_dir), [])
+
+    def write(self, name: str, source: str):
+        with open(os.path.join(self.input_dir, name), "w") as jack_file:
+            jack_file.write(source)
+
+    def test_deleted_source_removes_its_xml(self):
+        other_xml = os.path.join(self.output_dir, "lib", "Other.xml")
+        self.assertTrue(os.path.exists(other_xml))
+        os.remove(os.path.join(self.input_dir, "lib", "Other.jack"))
+        self.write("Main.jack", CHANGED_MAIN)
+        self.watcher.run(max_rebuilds=1)
+        self.assertFalse(os.path.exists(other_xml))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "Main.xml")))
+
+    def test_rebuilds_use_the_build_cache(self):
+        self.write("Main.jack", CHANGED_MAIN)
+        self.watcher.run(max_rebuilds=1)
+        hits = self.cache.hits
+        # Back to a source compiled by the first build
+        self.write("Main.jack", MAIN)
+        self.watcher.run(max_rebuilds=1)
+        self.assertEqual(self.cache.hits, hits + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()